@@ -0,0 +1,3 @@
+"""
+Benchmarks for the VCU simulator hot paths
+"""
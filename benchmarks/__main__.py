@@ -0,0 +1,6 @@
+"""
+python -m benchmarks: run the MessageSender hot-path suite (see suite.py)
+"""
+from .suite import main
+
+main()
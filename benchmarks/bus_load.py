@@ -0,0 +1,51 @@
+"""
+Bus load of the classic vs CAN FD frame profiles
+
+    python -m benchmarks.bus_load [--nominal-bitrate N] [--data-bitrate N]
+"""
+import argparse
+from src.config.settings import MESSAGE_PERIODS_MS, NOMINAL_BITRATE, FD_DATA_BITRATE
+from src.handlers.message_sender import CODECS, FRAME_PROFILES
+from src.utils.bus_load import bus_load
+from src.utils.can_ids import FD_METRIC_GROUPS, FD_MESSAGE_DEFINITIONS
+
+FD_IDS = {d.arbitration_id for d in FD_MESSAGE_DEFINITIONS}
+# Classic messages whose signals the FD profile sends inside an FD frame
+PACKED_IDS = {i for members in FD_METRIC_GROUPS.values() for i in members}
+
+def profile_frames(frame_profile, full_catalog):
+    """(length, period, is_fd) for every frame a profile broadcasts"""
+    if frame_profile == "fd":
+        # FD frames plus the classic frames that are not packed into them
+        ids = [i for i in MESSAGE_PERIODS_MS if i not in PACKED_IDS]
+    else:
+        ids = [i for i in MESSAGE_PERIODS_MS if i not in FD_IDS]
+    if not full_catalog:
+        # Restrict to what the simulator actually sends today
+        from src.handlers.message_sender import MessageSender
+        from src.utils.bus_backends import NullBus
+        sender = MessageSender(NullBus(), frame_profile=frame_profile)
+        ids = [i for i in ids if i in sender.cyclic_senders()]
+        sender.shutdown()
+    return [(CODECS[i].length, MESSAGE_PERIODS_MS[i], i in FD_IDS) for i in ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nominal-bitrate", type=int, default=NOMINAL_BITRATE)
+    parser.add_argument("--data-bitrate", type=int, default=FD_DATA_BITRATE)
+    args = parser.parse_args()
+
+    print(f"Nominal {args.nominal_bitrate / 1000:.0f} kbit/s, FD data {args.data_bitrate / 1000:.0f} kbit/s "
+          f"(worst-case stuffing)")
+    print(f"{'catalog':<10} {'profile':<8} {'frames':>7} {'frames/s':>9} {'bus load':>9}")
+    for full_catalog in (False, True):
+        for frame_profile in FRAME_PROFILES:
+            frames = profile_frames(frame_profile, full_catalog)
+            load = bus_load(frames, args.nominal_bitrate, args.data_bitrate)
+            print(f"{'full' if full_catalog else 'simulated':<10} {frame_profile:<8} {len(frames):>7} "
+                  f"{load['frames_per_second']:>9.1f} {load['utilization'] * 100:>8.2f}%")
+
+
+if __name__ == "__main__":
+    main()
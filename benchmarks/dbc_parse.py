@@ -0,0 +1,72 @@
+"""
+DBC parse time for a production-sized catalog, cold vs cached
+
+    python -m benchmarks.dbc_parse [--signals N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from src.utils.dbc import dump_dbc, load_dbc, load_dbc_cached
+from src.utils.signals import Signal, MessageDefinition, compile_codecs, BIG_ENDIAN, LITTLE_ENDIAN
+
+def synthetic_catalog(signal_count, signals_per_message=8):
+    """Messages of eight 8-bit signals, alternating byte order and scaling"""
+    definitions = []
+    for index in range(0, signal_count, signals_per_message):
+        arbitration_id = 0x100 + index // signals_per_message
+        byte_order = LITTLE_ENDIAN if arbitration_id % 2 else BIG_ENDIAN
+        signals = [
+            Signal(f"Sig_{arbitration_id:X}_{i}", i * 8 + (0 if byte_order == LITTLE_ENDIAN else 7), 8,
+                   byte_order, factor=0.5 if i % 2 else 1, offset=-40 if i % 3 == 0 else 0,
+                   signed=i % 4 == 0, minimum=-40, maximum=87, unit="degC")
+            for i in range(min(signals_per_message, signal_count - index))
+        ]
+        definitions.append(MessageDefinition(f"Msg_{arbitration_id:X}", arbitration_id, 8, signals,
+                                             comment=f"Synthetic message {arbitration_id:X}",
+                                             cycle_time_ms=100))
+    return definitions
+
+
+def timed(func, repeat):
+    """Best wall time of `repeat` calls, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--signals", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "production.dbc")
+        cache_dir = os.path.join(workdir, "cache")
+        dump_dbc(synthetic_catalog(args.signals), path)
+        size_kb = os.path.getsize(path) / 1024
+
+        parse_ms, definitions = timed(lambda: load_dbc(path), args.repeat)
+        load_dbc_cached(path, cache_dir)  # populate the cache
+        cached_ms, _ = timed(lambda: load_dbc_cached(path, cache_dir), args.repeat)
+        compile_ms, codecs = timed(lambda: compile_codecs(definitions), args.repeat)
+        # Break compile_codecs down on the codecs it built; results are discarded
+        struct_ms, _ = timed(lambda: [c._compile_struct() for c in codecs.values()], args.repeat)
+        generate_ms, _ = timed(lambda: [c._compile_encoder() for c in codecs.values()], args.repeat)
+
+    signals = sum(len(d.signals) for d in definitions)
+    print(f"DBC: {len(definitions)} messages, {signals} signals, {size_kb:.0f} KiB")
+    print(f"  parse (cold):       {parse_ms:8.2f} ms")
+    print(f"  load (disk cache):  {cached_ms:8.2f} ms")
+    structs = sum(c.struct is not None for c in codecs.values())
+    print(f"  compile codecs:     {compile_ms:8.2f} ms  ({len(codecs)} messages, at load)")
+    print(f"    struct layouts:   {struct_ms:8.2f} ms  ({structs} byte-aligned)")
+    print(f"    encoders:         {generate_ms:8.2f} ms  (generated source, exec'd)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Per-tick cost of fleet dynamics: per-vehicle update_dynamic_values vs VectorEngine
+
+    python -m benchmarks.fleet_dynamics [--vehicles 10,100,1000,5000] [--ticks N]
+"""
+import argparse
+import time
+from src.fleet.vector_engine import VectorEngine
+from src.handlers.message_sender import MessageSender
+from src.utils.bus_backends import NullBus
+from src.utils.can_ids import VehicleStates
+
+STATES = (VehicleStates.PARK, VehicleStates.DRIVE, VehicleStates.CHARGE)
+
+def time_per_tick(tick, ticks):
+    """Mean seconds per call of `tick`"""
+    tick()  # warm up
+    started = time.perf_counter()
+    for _ in range(ticks):
+        tick()
+    return (time.perf_counter() - started) / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vehicles", default="10,100,1000,5000")
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    bus = NullBus()
+    print(f"{'vehicles':>8} {'scalar us/tick':>15} {'vector us/tick':>15} {'speedup':>8}")
+    for count in (int(v) for v in args.vehicles.split(",")):
+        states = [STATES[i % len(STATES)] for i in range(count)]
+
+        senders = [MessageSender(bus, seed=[count, i]) for i in range(count)]
+        for sender, state in zip(senders, states):
+            sender.current_state = state
+
+        def scalar_tick():
+            for sender in senders:
+                sender.update_dynamic_values()
+
+        engine = VectorEngine(count, seed=count)
+        engine.set_states(states)
+        try:
+            scalar = time_per_tick(scalar_tick, args.ticks)
+            vector = time_per_tick(engine.step, args.ticks)
+        finally:
+            for sender in senders:
+                sender.shutdown()
+        print(f"{count:>8} {scalar * 1e6:>15.1f} {vector * 1e6:>15.1f} {scalar / vector:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Allocations per broadcast tick: legacy list + can.Message path vs cached frames
+
+    python -m benchmarks.frame_allocations [--ticks N]
+"""
+import argparse
+import tracemalloc
+import can
+from src.handlers.message_sender import MessageSender
+from src.utils.bus_backends import NullBus
+from src.utils.can_ids import *
+
+class CountingMessage(can.Message):
+    """can.Message that counts constructions (installed as can.Message for both paths)"""
+    created = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingMessage.created += 1
+        super().__init__(*args, **kwargs)
+
+
+def legacy_tick(sender, bus):
+    """Frames of one tick built the way send_* did before the frame cache"""
+    values = sender.current_values
+    payloads = [
+        (VEHICLE_STATE_ID, [sender.current_state & 0xFF, sender.current_substate & 0xFF,
+                            sender.status_flags & 0xFF, 0, 0, 0, 0x00, 0x00]),
+        (VEHICLE_FAULT_ID, [0, 0, 0, 0, 0, 0, 0, 0]),
+        (POWER_OUTPUT_ID, [int(abs(values["power_output"]))]),
+        (CHARGE_PERCENTAGE_ID, [int(values["charge_percent"])]),
+        (BATTERY_TEMP_ID, [int(values["battery_temp"])]),
+        (MOTOR_TEMP_ID, [int(values["motor_temp"])]),
+        (TIRE_TEMP_ID, [int(t) for t in values["tire_temps"]]),
+        (TIRE_PRESSURE_ID, [int(p) for p in values["tire_pressures"]]),
+    ]
+    for arbitration_id, data in payloads:
+        bus.send(CountingMessage(arbitration_id=arbitration_id, data=data,
+                                 is_extended_id=False, dlc=len(data)))
+
+
+def cached_tick(sender, senders):
+    """Frames of one tick through the current MessageSender path"""
+    for send in senders:
+        send()
+    sender.writer.flush()
+
+
+def measure(tick, ticks, count_messages):
+    """Message objects and traced bytes allocated per tick"""
+    tick()  # warm caches
+    messages_before = count_messages()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    for _ in range(ticks):
+        tick()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "messages_per_tick": (count_messages() - messages_before) / ticks,
+        "peak_transient_bytes": peak - base,
+        "retained_bytes_per_tick": (current - base) / ticks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=10000)
+    args = parser.parse_args()
+
+    # Count every can.Message built anywhere (frame cache, transmit path)
+    # the same way for both paths
+    original_message, can.Message = can.Message, CountingMessage
+    bus = NullBus()
+    sender = MessageSender(bus)
+    senders = list(sender.cyclic_senders().values())
+    count_messages = lambda: CountingMessage.created
+    try:
+        legacy = measure(lambda: legacy_tick(sender, bus), args.ticks, count_messages)
+        cached = measure(lambda: cached_tick(sender, senders), args.ticks, count_messages)
+    finally:
+        sender.shutdown()
+        can.Message = original_message
+
+    print(f"{'path':<8} {'can.Message/tick':>18} {'peak transient B':>18} {'retained B/tick':>16}")
+    for name, result in (("legacy", legacy), ("cached", cached)):
+        print(f"{name:<8} {result['messages_per_tick']:>18.2f} "
+              f"{result['peak_transient_bytes']:>18} {result['retained_bytes_per_tick']:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Performance history: run old_revs/* and the current tree for the same virtual
+duration against a stubbed bus and compare per-ID rates, CPU time and allocations
+
+    python -m benchmarks.revisions [--revisions rev1,rev7,current] [--duration 600] [--output history.json]
+
+Each revision runs in its own interpreter with its directory first on
+sys.path, so its `src`/`message_sender` modules are the ones imported.
+`can.Bus`/`can.interface.Bus` are replaced by a recording stub, `asyncio.sleep`
+advances a virtual clock instead of waiting (and `time.time` follows it),
+and the revision's broadcast coroutine runs until the virtual duration is
+over. Only the metrics loop runs; keyboard and GPIO tasks are not started.
+"""
+import argparse
+import asyncio
+import collections
+import importlib.util
+import inspect
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import can
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OLD_REVS = os.path.join(REPO_ROOT, "old_revs")
+CURRENT = "current"
+
+class RunFinished(BaseException):
+    """Raised from the patched sleep once the virtual duration is over.
+
+    A BaseException, so the revisions' `except Exception` retry loops do
+    not swallow it.
+    """
+
+
+class RecordingBus(can.BusABC):
+    """Stub bus that counts the frames sent per arbitration ID"""
+
+    def __init__(self, channel="stub", **kwargs):
+        super().__init__(channel=channel)
+        self.channel_info = "recording stub"
+        self.counts = collections.Counter()
+
+    def send(self, msg, timeout=None):
+        self.counts[msg.arbitration_id] += 1
+
+    def _recv_internal(self, timeout):
+        return None, False
+
+
+class CountingMessage(can.Message):
+    """can.Message that counts constructions"""
+    created = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingMessage.created += 1
+        super().__init__(*args, **kwargs)
+
+
+def revision_path(name):
+    return REPO_ROOT if name == CURRENT else os.path.join(OLD_REVS, name)
+
+
+def list_revisions():
+    """Every old revision (oldest first) followed by the current tree"""
+    return sorted(d for d in os.listdir(OLD_REVS) if os.path.isfile(os.path.join(OLD_REVS, d, "main.py"))) + [CURRENT]
+
+
+def run_revision(name, duration):
+    """Child process: run one revision's broadcast loop and return its measurements"""
+    root = revision_path(name)
+    sys.path[:] = [root] + [p for p in sys.path if p not in ("", REPO_ROOT, os.getcwd())]
+
+    bus = RecordingBus()
+    virtual = {"now": 0.0}
+    epoch = time.time()
+    real_sleep = asyncio.sleep
+
+    async def virtual_sleep(delay, result=None):
+        virtual["now"] += max(0.0, delay)
+        if virtual["now"] >= duration:
+            raise RunFinished()
+        return await real_sleep(0, result)
+
+    # Stub the bus before the revision's modules create it at import time
+    can.Bus = can.interface.Bus = lambda *args, **kwargs: bus
+    can.Message = CountingMessage
+    asyncio.sleep = virtual_sleep
+    time.time = lambda: epoch + virtual["now"]
+
+    spec = importlib.util.spec_from_file_location("revision_main", os.path.join(root, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    if hasattr(module, "VCUSimulator"):
+        if "clock" in inspect.signature(module.VCUSimulator).parameters:
+            # The current tree runs its own virtual clock for the duration
+            from src.utils.clock import VirtualClock
+            simulator = module.VCUSimulator(bus, clock=VirtualClock(), duration=duration)
+        else:
+            simulator = module.VCUSimulator()
+        coroutine = simulator.run_metrics_broadcast
+        sender = simulator.message_sender
+    else:
+        coroutine = getattr(module, "send_metrics", None) or module.main
+        sender = None
+
+    async def broadcast():
+        try:
+            await coroutine()
+        except RunFinished:
+            pass
+
+    bus.counts.clear()
+    messages_before = CountingMessage.created
+    blocks_before = sys.getallocatedblocks()
+    cpu_before = time.process_time()
+    asyncio.run(broadcast())
+    if sender is not None and hasattr(sender, "writer"):
+        sender.writer.flush()
+    cpu = time.process_time() - cpu_before
+
+    frames = sum(bus.counts.values())
+    return {
+        "revision": name,
+        "duration_s": duration,
+        "frames": frames,
+        "rates_hz": {f"{i:#05x}": count / duration for i, count in sorted(bus.counts.items())},
+        "cpu_s": cpu,
+        "cpu_ms_per_virtual_s": cpu * 1000 / duration,
+        "messages_created": CountingMessage.created - messages_before,
+        "retained_blocks": sys.getallocatedblocks() - blocks_before,
+    }
+
+
+def measure(name, duration):
+    """Run one revision in a fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.revisions", "--child", name, "--duration", str(duration)],
+        cwd=REPO_ROOT, capture_output=True, text=True)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode or not lines:
+        error = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+        return {"revision": name, "error": error}
+    return json.loads(lines[-1])
+
+
+def print_table(results, target_rates):
+    ok = [r for r in results if "error" not in r]
+    ids = sorted({i for r in ok for i in r["rates_hz"]} | set(target_rates))
+    width = max(10, *(len(r["revision"]) + 1 for r in results))
+    print(f"{'Hz per ID':<22} {'target':>8}" + "".join(f"{r['revision']:>{width}}" for r in ok))
+    for arbitration_id in ids:
+        target = target_rates.get(arbitration_id)
+        row = f"{arbitration_id:<22} {target if target is not None else '-':>8}"
+        for r in ok:
+            rate = r["rates_hz"].get(arbitration_id)
+            row += f"{rate:>{width}.3f}" if rate is not None else f"{'-':>{width}}"
+        print(row)
+    for key, label, fmt in (
+        ("frames", "frames", "d"),
+        ("cpu_ms_per_virtual_s", "CPU ms / virtual s", ".3f"),
+        ("messages_created", "can.Message created", "d"),
+        ("retained_blocks", "retained blocks", "d"),
+    ):
+        print(f"{label:<22} {'':>8}" + "".join(f"{r[key]:>{width}{fmt}}" for r in ok))
+    for r in results:
+        if "error" in r:
+            print(f"{r['revision']}: failed ({r['error']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--revisions", help=f"comma-separated, e.g. rev1,rev7,{CURRENT} (default: all)")
+    parser.add_argument("--duration", type=float, default=600.0, help="virtual seconds per revision")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        # Keep the revision's prints and logging off the result line
+        stdout, sys.stdout = sys.stdout, io.StringIO()
+        try:
+            result = run_revision(args.child, args.duration)
+        finally:
+            sys.stdout = stdout
+        print(json.dumps(result))
+        return
+
+    from src.config.settings import MESSAGE_PERIODS_MS
+    target_rates = {f"{i:#05x}": 1000 / p for i, p in MESSAGE_PERIODS_MS.items()}
+    names = args.revisions.split(",") if args.revisions else list_revisions()
+    results = []
+    for name in names:
+        print(f"Running {name} for {args.duration:g} virtual seconds...", file=sys.stderr)
+        results.append(measure(name, args.duration))
+    print_table(results, target_rates)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
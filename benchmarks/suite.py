@@ -0,0 +1,187 @@
+"""
+MessageSender hot-path suite: frames/s per send method, update and full tick
+cost, and memory per simulated vehicle, saved as JSON for comparing runs
+
+    python -m benchmarks [--bus null|virtual] [--profile classic|fd] [--output results.json]
+                         [--compare baseline.json]
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import can
+import numpy as np
+from src.fleet.runner import FleetRunner, FLEET_ENGINES
+from src.handlers.message_sender import MessageSender, FRAME_PROFILES
+from src.utils.bus_backends import NullBus
+from src.utils.can_ids import VehicleStates
+from src.utils.clock import VirtualClock
+from src.config.settings import MESSAGE_PERIODS_MS
+
+BUSES = {
+    "null": lambda: NullBus(),
+    "virtual": lambda: can.Bus("benchmark", interface="virtual"),
+}
+
+def per_call(call, count):
+    """Mean seconds per call of `call`"""
+    call()  # warm up
+    started = time.perf_counter()
+    for _ in range(count):
+        call()
+    return (time.perf_counter() - started) / count
+
+
+def new_sender(make_bus, profile):
+    """Sender on an unpaced virtual clock, so frames go to the bus inline"""
+    sender = MessageSender(make_bus(), frame_profile=profile, seed=1, clock=VirtualClock())
+    sender.current_state = VehicleStates.DRIVE
+    return sender
+
+
+def send_methods(make_bus, profile, count):
+    """Frames per second of every cyclic send method, through queue and bus"""
+    sender = new_sender(make_bus, profile)
+    results = {}
+    try:
+        for arbitration_id, send in sender.cyclic_senders().items():
+            name = getattr(send, "__name__", None) or send.func.__name__
+            results[f"{arbitration_id:#05x} {name}"] = round(1.0 / per_call(send, count))
+    finally:
+        sender.shutdown()
+    return results
+
+
+def update_tick(make_bus, profile, count):
+    """Microseconds per update_dynamic_values call"""
+    sender = new_sender(make_bus, profile)
+    try:
+        return round(per_call(sender.update_dynamic_values, count) * 1e6, 2)
+    finally:
+        sender.shutdown()
+
+
+def full_tick(make_bus, profile, ticks):
+    """Microseconds per scheduler tick: dynamics plus every send due in it"""
+    clock = VirtualClock()
+    fleet = FleetRunner(1, [make_bus()], id_offsets=False, seed=1, frame_profile=profile, clock=clock)
+    for writer in fleet.writers:
+        writer.start_inline()
+    scheduler = fleet.scheduler
+    try:
+        started = time.perf_counter()
+        scheduler.run_until(clock.now() + ticks * scheduler.tick_ms / 1000.0)
+        elapsed = time.perf_counter() - started
+    finally:
+        fleet.shutdown()
+    return {
+        "tick_ms": scheduler.tick_ms,
+        "us_per_tick": round(elapsed / scheduler.ticks_run * 1e6, 2),
+        "frames_per_tick": round(fleet.vehicles[0].tx_queue.sent / scheduler.ticks_run, 2),
+    }
+
+
+def memory_per_vehicle(profile, vehicles):
+    """Bytes allocated per vehicle of a fleet, for each dynamics engine"""
+    results = {}
+    for engine in FLEET_ENGINES:
+        tracemalloc.start()
+        base, _ = tracemalloc.get_traced_memory()
+        fleet = FleetRunner(vehicles, [NullBus()], seed=1, frame_profile=profile, engine=engine,
+                            clock=VirtualClock())
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        fleet.shutdown()
+        results[engine] = round((current - base) / vehicles)
+    return results
+
+
+def revision():
+    """Short git revision of the tree being measured, if available"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(bus_name, profile, count, ticks, vehicles):
+    """Run the whole suite and return the results with run metadata"""
+    make_bus = BUSES[bus_name]
+    results = {
+        "send_frames_per_second": send_methods(make_bus, profile, count),
+        "update_dynamic_values_us": update_tick(make_bus, profile, count),
+        "full_tick": full_tick(make_bus, profile, ticks),
+        "memory_bytes_per_vehicle": memory_per_vehicle(profile, vehicles),
+    }
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": revision(),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}",
+            "python_can": can.__version__,
+            "numpy": np.__version__,
+            "bus": bus_name,
+            "frame_profile": profile,
+            "periods_ms": {f"{i:#05x}": p for i, p in MESSAGE_PERIODS_MS.items()},
+        },
+        "results": results,
+    }
+
+
+def flatten(results, prefix=""):
+    """{"a": {"b": 1}} -> {"a.b": 1}"""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def print_results(run_results, baseline=None):
+    current = flatten(run_results["results"])
+    previous = flatten(baseline["results"]) if baseline else {}
+    if baseline:
+        print(f"baseline: {baseline['meta'].get('revision')} ({baseline['meta'].get('timestamp')})")
+    print(f"{'metric':<52} {'value':>12}" + (f" {'baseline':>12} {'change':>8}" if baseline else ""))
+    for name, value in current.items():
+        line = f"{name:<52} {value:>12}"
+        if name in previous:
+            old = previous[name]
+            change = f"{(value - old) / old * 100:+.1f}%" if old else "-"
+            line += f" {old:>12} {change:>8}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bus", choices=sorted(BUSES), default="null")
+    parser.add_argument("--profile", choices=FRAME_PROFILES, default="classic")
+    parser.add_argument("--count", type=int, default=20000, help="calls per send/update measurement")
+    parser.add_argument("--ticks", type=int, default=20000, help="scheduler ticks for the full tick cost")
+    parser.add_argument("--vehicles", type=int, default=200, help="fleet size for memory per vehicle")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    results = run(args.bus, args.profile, args.count, args.ticks, args.vehicles)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Fleet mode: simulate many VCUs from one process for infotainment load tests
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from src.fleet.runner import FleetRunner, FLEET_ENGINES
+from src.fleet.sharding import ShardedFleet
+from src.handlers.message_sender import FRAME_PROFILES
+from src.utils.bus_backends import BACKENDS, create_bus
+from src.utils.clock import REAL_CLOCK, parse_speed
+from src.utils.logs import setup_logging
+from src.config.settings import BUS_BACKEND, BUS_CHANNEL, FRAME_PROFILE
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+def parse_args(argv=None):
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="VCU fleet simulator")
+    parser.add_argument("--vehicles", type=int, default=10, help="number of simulated vehicles")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=BUS_BACKEND,
+                        help=f"bus backend (default: {BUS_BACKEND})")
+    parser.add_argument("--channels", default=BUS_CHANNEL,
+                        help="comma-separated channels; vehicles are spread over them round-robin")
+    parser.add_argument("--no-id-offsets", dest="id_offsets", action="store_false",
+                        help="one vehicle per channel on the plain catalog IDs")
+    parser.add_argument("--seed", type=int, help="fleet RNG seed (random if omitted)")
+    parser.add_argument("--duration", type=float, help="seconds to run (until Ctrl-C if omitted)")
+    parser.add_argument("--speed", type=parse_speed, default=REAL_CLOCK,
+                        help="clock speed: 1 for real time, N times faster, or max (single process only)")
+    parser.add_argument("--start", type=datetime.fromisoformat,
+                        help="simulated time of the first frame with --speed, ISO format (default: now)")
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument("--frame-profile", choices=FRAME_PROFILES, default=FRAME_PROFILE)
+    parser.add_argument("--engine", choices=FLEET_ENGINES, default="scalar",
+                        help="per-vehicle updates, or one batched NumPy update for the whole fleet")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to shard vehicles over (e.g. one per core)")
+    args = parser.parse_args(argv)
+    if args.start is not None:
+        if args.speed is REAL_CLOCK:
+            parser.error("--start needs a virtual clock (--speed)")
+        args.speed.start = args.start.timestamp()
+    return args
+
+def run_sharded(args, channels):
+    """Run the fleet over worker processes with this process coordinating"""
+    fleet = None
+    try:
+        fleet = ShardedFleet(args.vehicles, args.workers, args.backend, channels,
+                             id_offsets=args.id_offsets, seed=args.seed, frame_profile=args.frame_profile,
+                             engine=args.engine)
+        fleet.run(args.duration, args.report_interval)
+    except KeyboardInterrupt:
+        logger.info("Fleet stopped by user")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+    finally:
+        if fleet is not None:
+            fleet.stop()
+            logger.info(f"Fleet stats: {fleet.report()}")
+
+def main():
+    """Entry point"""
+    args = parse_args()
+    channels = args.channels.split(",") if args.channels else [None]
+    if args.workers > 1:
+        if args.speed is not REAL_CLOCK:
+            logger.error("--speed needs a single process (--workers 1)")
+            return
+        run_sharded(args, channels)
+        return
+    fd = args.frame_profile == "fd"
+    fleet = None
+    try:
+        bus_options = {"fd": fd}
+        if args.backend == "file":
+            bus_options["clock"] = args.speed.epoch
+        buses = [create_bus(args.backend, channel, **bus_options) for channel in channels]
+        fleet = FleetRunner(args.vehicles, buses, id_offsets=args.id_offsets, seed=args.seed,
+                            frame_profile=args.frame_profile, engine=args.engine, clock=args.speed)
+        asyncio.run(fleet.run(args.duration, args.report_interval))
+    except KeyboardInterrupt:
+        logger.info("Fleet stopped by user")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+    finally:
+        if fleet is not None:
+            fleet.shutdown()
+            logger.info(f"Fleet stats: {fleet.report()}")
+
+if __name__ == "__main__":
+    main()
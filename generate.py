@@ -0,0 +1,70 @@
+"""
+Headless trace generation: write simulator traffic to candump/ASC/BLF/binary trace files
+"""
+import argparse
+import logging
+from datetime import datetime
+from src.handlers.message_sender import FRAME_PROFILES
+from src.handlers.trace_generator import TraceGenerator
+from src.utils.can_ids import VehicleStates
+from src.utils.dbc import load_dbc_cached
+from src.utils.signals import compile_codecs
+from src.utils.logs import setup_logging
+from src.config.settings import DBC_CACHE_DIR, FRAME_PROFILE, SIMULATION_SEED
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+STATES = {
+    "park": VehicleStates.PARK,
+    "drive": VehicleStates.DRIVE,
+    "reverse": VehicleStates.REVERSE,
+    "charge": VehicleStates.CHARGE,
+}
+
+def parse_args(argv=None):
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Generate VCU traffic into a trace file")
+    parser.add_argument("output", help="trace file: .log (candump), .asc, .blf, .vtrace (indexed binary) "
+                                             "or any python-can format")
+    parser.add_argument("--duration", type=float, default=3600.0,
+                        help="seconds of simulated traffic (default: 3600)")
+    parser.add_argument("--vehicles", type=int, default=1, help="simulate a fleet on vehicle ID offsets")
+    parser.add_argument("--seed", type=int, default=SIMULATION_SEED, help="seed (random if omitted)")
+    parser.add_argument("--state", choices=sorted(STATES), help="vehicle state for the whole trace")
+    parser.add_argument("--start", type=datetime.fromisoformat,
+                        help="timestamp of the first frame, ISO format (default: now)")
+    parser.add_argument("--frame-profile", choices=FRAME_PROFILES, default=FRAME_PROFILE)
+    parser.add_argument("--dbc", help="load the message/signal layout from a DBC file")
+    return parser.parse_args(argv)
+
+def main():
+    """Entry point"""
+    args = parse_args()
+    generator = None
+    try:
+        codecs = None
+        if args.dbc:
+            codecs = compile_codecs(load_dbc_cached(args.dbc, DBC_CACHE_DIR))
+        generator = TraceGenerator(
+            args.output,
+            vehicles=args.vehicles,
+            seed=args.seed,
+            frame_profile=args.frame_profile,
+            start=args.start.timestamp() if args.start else None,
+            state=STATES.get(args.state),
+            codecs=codecs
+        )
+        logger.info(f"Generating {args.duration:g}s of traffic into {args.output}")
+        generator.run(args.duration)
+    except KeyboardInterrupt:
+        logger.info("Generation stopped by user")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+    finally:
+        if generator is not None:
+            generator.close()
+            logger.info(f"Trace stats: {generator.report()}")
+
+if __name__ == "__main__":
+    main()
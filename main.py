@@ -1,28 +1,53 @@
 """
 Main program for VCU simulator with faster updates and continuous fault messages
 """
+import argparse
 import asyncio
 import logging
 import sys
 import termios
 import tty
 import select
+import signal
+from datetime import datetime
 from src.handlers.keyboard_handler import KeyboardHandler
-from src.handlers.message_sender import MessageSender
+from src.handlers.loopback_monitor import LoopbackMonitor
+from src.handlers.metrics_server import MetricsServer
+from src.handlers.message_sender import MessageSender, FRAME_PROFILES
 from src.utils.can_ids import VehicleStates
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    stream=sys.stdout
+from src.utils.scheduler import DeadlineScheduler
+from src.utils.bus_backends import BACKENDS, create_bus
+from src.utils.clock import REAL_CLOCK, parse_speed
+from src.utils.can_ids import MESSAGE_DEFINITIONS, FD_MESSAGE_DEFINITIONS
+from src.utils.dbc import dump_dbc, load_dbc_cached
+from src.utils.signals import compile_codecs
+from src.utils.logs import setup_logging
+from src.config.settings import (
+    MESSAGE_PERIODS_MS, CYCLIC_OFFLOAD, BUS_BACKEND, BUS_CHANNEL, DBC_CACHE_DIR, FRAME_PROFILE,
+    SIMULATION_SEED, METRICS_PORT
 )
+
+setup_logging()
 logger = logging.getLogger(__name__)
 
 class VCUSimulator:
-    def __init__(self):
-        self.message_sender = MessageSender()
+    def __init__(self, bus=None, cyclic_offload=CYCLIC_OFFLOAD, codecs=None, frame_profile=FRAME_PROFILE,
+                 seed=SIMULATION_SEED, clock=REAL_CLOCK, duration=None, metrics_port=METRICS_PORT):
+        if cyclic_offload and clock is not REAL_CLOCK:
+            raise ValueError("Cyclic offload runs on the kernel's clock and needs real time")
+        self.clock = clock
+        self.duration = duration
+        self.message_sender = MessageSender(bus, codecs=codecs, frame_profile=frame_profile, seed=seed,
+                                            clock=clock)
+        logger.info(f"Simulation seed {self.message_sender.seed}")
+        if cyclic_offload:
+            # Kernel sends the frames; the scheduler only refreshes payloads
+            self.message_sender.enable_cyclic_offload(MESSAGE_PERIODS_MS)
         self.keyboard_handler = KeyboardHandler(self.message_sender)
-        self.message_counter = 0
+        self.scheduler = self._build_scheduler()
+        self.metrics_server = None
+        if metrics_port is not None:
+            self.metrics_server = MetricsServer(self.scheduler, self.message_sender.tx_queue, metrics_port)
         
         # Initialize default state
         self.message_sender.current_state = VehicleStates.PARK
@@ -30,8 +55,9 @@ class VCUSimulator:
         self.message_sender.status_flags = VehicleStates.SYSTEMS_CHECK_PASS | VehicleStates.BATTERY_OK
         
         # Send initial state message
-        self.message_sender.send_state_message()
-        self.message_sender.send_fault_message()  # Send initial fault status
+        with self.message_sender.event_send():
+            self.message_sender.send_state_message()
+            self.message_sender.send_fault_message()  # Send initial fault status
         
         self._print_instructions()
 
@@ -54,44 +80,27 @@ Current State: PARK
 ==================
 """)
 
-    async def run_metrics_broadcast(self):
-        """Continuously broadcast state and metrics."""
-        while self.keyboard_handler.running:
-            try:
-                # Update dynamic values
-                self.message_sender.update_dynamic_values()
-                
-                # Send all metrics
-                await self._send_all_metrics()
-                await asyncio.sleep(0.1)  
-            except Exception as e:
-                logger.error(f"Error in metrics broadcast: {e}")
-                await asyncio.sleep(0.1)
+    def _build_scheduler(self):
+        """Schedule every cyclic message at its configured period"""
+        scheduler = DeadlineScheduler(MESSAGE_PERIODS_MS, self.clock)
+        scheduler.add_tick_hook(self.message_sender.update_dynamic_values)
+        for arbitration_id, send in self.message_sender.cyclic_senders().items():
+            scheduler.register(arbitration_id, send)
+        return scheduler
 
-    async def _send_all_metrics(self):
-        """Send all metrics with different priorities"""
+    async def run_metrics_broadcast(self):
+        """Continuously broadcast state and metrics on fixed deadlines."""
+        end = None if self.duration is None else self.clock.now() + self.duration
         try:
-            # High priority messages (100ms)
-            self.message_sender.send_state_message()
-            self.message_sender.send_fault_message()  # Added fault status to high priority
-            self.message_sender.send_power_output()
-            await asyncio.sleep(0.01)
-            
-            # Medium priority messages (200ms)
-            if self.message_counter % 2 == 0:
-                self.message_sender.send_motor_temp()
-                self.message_sender.send_battery_temp()
-            await asyncio.sleep(0.01)
-            
-            # Lower priority messages (500ms)
-            if self.message_counter % 5 == 0:
-                self.message_sender.send_tire_data()
-                self.message_sender.send_charge_percentage()
-                
-            self.message_counter = (self.message_counter + 1) % 5
-            
+            await self.scheduler.run(
+                lambda: self.keyboard_handler.running and (end is None or self.clock.now() < end)
+            )
         except Exception as e:
-            logger.error(f"Error sending metrics: {e}")
+            logger.error(f"Error in metrics broadcast: {e}")
+        finally:
+            # Stop the keyboard task too once the run's duration is over
+            self.keyboard_handler.running = False
+            logger.info(f"Broadcast schedule stats: {self.scheduler.report()}")
 
     async def run_keyboard(self):
         """Handle keyboard input using async approach."""
@@ -115,9 +124,17 @@ Current State: PARK
         """Check if there is data available to read."""
         return select.select([sys.stdin], [], [], 0)[0] != []
 
+    def dump_send_latency(self):
+        """Log the per-ID bus.send latency histograms (on SIGUSR1 and at exit)"""
+        logger.info("\n" + self.message_sender.tx_queue.format_send_latency())
+
     async def main(self):
         """Main coroutine running all VCU tasks"""
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGUSR1, self.dump_send_latency)
         try:
+            if self.metrics_server is not None:
+                await self.metrics_server.start()
             metrics_task = asyncio.create_task(self.run_metrics_broadcast())
             keyboard_task = asyncio.create_task(self.run_keyboard())
             await asyncio.gather(metrics_task, keyboard_task)
@@ -126,17 +143,90 @@ Current State: PARK
         except Exception as e:
             logger.error(f"Error in main loop: {e}")
         finally:
+            loop.remove_signal_handler(signal.SIGUSR1)
+            if self.metrics_server is not None:
+                await self.metrics_server.stop()
             self.keyboard_handler.cleanup()
+            self.message_sender.shutdown()
+            logger.info(f"Transmit queue stats: {self.message_sender.tx_queue.stats()}")
+            logger.info(f"Enqueue-to-wire latency: {self.message_sender.writer.report()}")
+            self.dump_send_latency()
             
+def parse_args(argv=None):
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="VCU simulator")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=BUS_BACKEND,
+                        help=f"bus backend (default: {BUS_BACKEND})")
+    parser.add_argument("--channel", default=BUS_CHANNEL,
+                        help="bus channel, or output path for the file backend")
+    parser.add_argument("--cyclic-offload", action="store_true", default=CYCLIC_OFFLOAD,
+                        help="send cyclic frames from the bus's periodic transmit (CAN_BCM)")
+    parser.add_argument("--frame-profile", choices=FRAME_PROFILES, default=FRAME_PROFILE,
+                        help="classic frames per metric, or metrics packed into CAN FD frames")
+    parser.add_argument("--seed", type=int, default=SIMULATION_SEED,
+                        help="seed of the simulated values; the same seed reproduces a run (random if omitted)")
+    parser.add_argument("--speed", type=parse_speed, default=REAL_CLOCK,
+                        help="clock speed: 1 for real time, N to run N times faster, max for as fast as possible")
+    parser.add_argument("--start", type=datetime.fromisoformat,
+                        help="simulated time of the first frame with --speed, ISO format (default: now)")
+    parser.add_argument("--duration", type=float,
+                        help="seconds of simulated time to run (until 'q' if omitted)")
+    parser.add_argument("--dbc", help="load the message/signal layout from a DBC file")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--measure", action="store_true",
+                        help="time every cyclic frame from a second socket on the same channel and "
+                             "print period/jitter and latency per ID on exit")
+    parser.add_argument("--export-dbc", metavar="PATH",
+                        help="write the built-in message catalog (classic and FD) as a DBC file and exit")
+    args = parser.parse_args(argv)
+    if args.start is not None:
+        if args.speed is REAL_CLOCK:
+            parser.error("--start needs a virtual clock (--speed)")
+        args.speed.start = args.start.timestamp()
+    return args
+
 def main():
     """Entry point"""
+    args = parse_args()
+    if args.export_dbc:
+        # Both profiles' messages, so the file loads with either --frame-profile
+        dump_dbc(MESSAGE_DEFINITIONS + FD_MESSAGE_DEFINITIONS, args.export_dbc, MESSAGE_PERIODS_MS)
+        return
+    monitor = None
     try:
-        simulator = VCUSimulator()
+        codecs = None
+        if args.dbc:
+            codecs = compile_codecs(load_dbc_cached(args.dbc, DBC_CACHE_DIR))
+        bus_options = {"fd": args.frame_profile == "fd"}
+        if args.backend == "file":
+            # Stamp logged frames with simulated time
+            bus_options["clock"] = args.speed.epoch
+        bus = create_bus(args.backend, args.channel, **bus_options)
+        if args.measure:
+            if args.backend in ("null", "file") or args.speed is not REAL_CLOCK:
+                raise ValueError("--measure needs a real-time bus that loops frames back (vcan, socketcan, virtual)")
+            # Open the receiving socket first so it sees the very first frames
+            monitor = LoopbackMonitor(create_bus(args.backend, args.channel, **bus_options), codecs=codecs)
+            monitor.start()
+        simulator = VCUSimulator(bus, cyclic_offload=args.cyclic_offload, codecs=codecs,
+                                 frame_profile=args.frame_profile, seed=args.seed,
+                                 clock=args.speed, duration=args.duration,
+                                 metrics_port=args.metrics_port)
+        if monitor is not None:
+            monitor.attach(simulator.message_sender.writer)
         asyncio.run(simulator.main())
     except KeyboardInterrupt:
         logger.info("VCU Simulator stopped by user")
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
+    finally:
+        if monitor is not None:
+            monitor.stop()
+            monitor.receiver.bus.shutdown()
+            print(monitor.format_summary())
+            if not all(r["within_limit"] for r in monitor.results().values()):
+                sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
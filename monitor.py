@@ -0,0 +1,80 @@
+"""
+Monitor VCU traffic: receive frames from a bus and print their decoded signals
+"""
+import argparse
+import logging
+import time
+from src.handlers.message_receiver import MessageReceiver
+from src.utils.bus_backends import BACKENDS, create_bus
+from src.utils.can_ids import VEHICLE_ID_STRIDE
+from src.utils.dbc import load_dbc_cached
+from src.utils.signals import compile_codecs
+from src.utils.logs import setup_logging
+from src.config.settings import BUS_BACKEND, BUS_CHANNEL, DBC_CACHE_DIR
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+def parse_ids(text):
+    """Parse "600,601,401" (hex catalog IDs) into a list of IDs"""
+    return [int(item, 16) for item in text.split(",") if item.strip()]
+
+def parse_args(argv=None):
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Receive and decode VCU frames")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=BUS_BACKEND,
+                        help=f"bus backend (default: {BUS_BACKEND})")
+    parser.add_argument("--channel", default=BUS_CHANNEL)
+    parser.add_argument("--ids", type=parse_ids, help="only these catalog IDs, hex, comma-separated")
+    parser.add_argument("--vehicle", type=int,
+                        help="fleet vehicle number (extended IDs at N * 0x800 + catalog ID)")
+    parser.add_argument("--dbc", help="decode with the message/signal layout from a DBC file")
+    parser.add_argument("--fd", action="store_true", help="open the bus in CAN FD mode")
+    parser.add_argument("--summary", type=float, metavar="SECONDS",
+                        help="print frame counts every SECONDS instead of every decoded frame")
+    return parser.parse_args(argv)
+
+def print_frame(values, msg):
+    """Print one decoded frame, candump style"""
+    fields = " ".join(f"{name}={value:g}" for name, value in values.items())
+    print(f"({msg.timestamp:.6f}) {msg.arbitration_id:03X} {fields}")
+
+def main():
+    """Entry point"""
+    args = parse_args()
+    receiver = None
+    bus = None
+    try:
+        codecs = None
+        if args.dbc:
+            codecs = compile_codecs(load_dbc_cached(args.dbc, DBC_CACHE_DIR))
+        bus = create_bus(args.backend, args.channel, fd=args.fd)
+        receiver = MessageReceiver(
+            bus,
+            codecs=codecs,
+            ids=args.ids,
+            id_offset=args.vehicle * VEHICLE_ID_STRIDE if args.vehicle is not None else 0,
+            is_extended_id=args.vehicle is not None
+        )
+        if args.summary is None:
+            for arbitration_id in receiver.ids:
+                receiver.subscribe(arbitration_id, print_frame)
+        receiver.start()
+        logger.info(f"Receiving {len(receiver.ids)} IDs on {bus.channel_info}")
+        while receiver.is_alive():
+            time.sleep(args.summary or 1.0)
+            if args.summary is not None:
+                logger.info(f"Receive stats: {receiver.report()}")
+    except KeyboardInterrupt:
+        logger.info("Monitor stopped by user")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+    finally:
+        if receiver is not None:
+            receiver.stop()
+            logger.info(f"Receive stats: {receiver.report()}")
+        if bus is not None:
+            bus.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Replay a recorded CAN trace (candump/ASC/BLF/...) onto a bus
+"""
+import argparse
+import logging
+from src.handlers.trace_replayer import TraceReplayer, parse_id_filters
+from src.utils.bus_backends import BACKENDS, create_bus
+from src.utils.logs import setup_logging
+from src.config.settings import BUS_BACKEND, BUS_CHANNEL
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+def parse_speed(text):
+    """Replay speed: a factor (1 = recorded timing) or "max" for as fast as possible"""
+    return None if text == "max" else float(text)
+
+def parse_args(argv=None):
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Replay a CAN trace onto a bus")
+    parser.add_argument("trace", help="trace file (.log, .asc, .blf, .vtrace or any python-can format)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=BUS_BACKEND,
+                        help=f"bus backend (default: {BUS_BACKEND})")
+    parser.add_argument("--channel", default=BUS_CHANNEL)
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="1 for recorded timing, N for N times faster, max for as fast as possible")
+    parser.add_argument("--ids", type=parse_id_filters,
+                        help="only replay these IDs: hex ID or ID:mask, comma-separated (e.g. 600,400:700)")
+    parser.add_argument("--start", type=float, help="skip the first START seconds of the trace")
+    parser.add_argument("--end", type=float, help="stop END seconds into the trace")
+    parser.add_argument("--fd", action="store_true", help="open the bus in CAN FD mode")
+    return parser.parse_args(argv)
+
+def main():
+    """Entry point"""
+    args = parse_args()
+    replayer = None
+    bus = None
+    try:
+        bus = create_bus(args.backend, args.channel, fd=args.fd)
+        replayer = TraceReplayer(bus, args.trace, speed=args.speed, id_filters=args.ids,
+                                 window=(args.start, args.end))
+        logger.info(f"Replaying {args.trace} at {'max' if args.speed is None else f'{args.speed:g}x'} speed")
+        replayer.run()
+    except KeyboardInterrupt:
+        logger.info("Replay stopped by user")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+    finally:
+        if replayer is not None:
+            replayer.stop()
+            logger.info(f"Replay stats: {replayer.report()}")
+        if bus is not None:
+            bus.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Simulator configuration: broadcast schedule for the VCU message catalog
+"""
+import math
+import os
+from functools import reduce
+from ..utils.can_ids import *
+
+# Broadcast period per arbitration ID in milliseconds (matches the README tables)
+MESSAGE_PERIODS_MS = {
+    # State and fault messages
+    VEHICLE_STATE_ID: 100,
+    VEHICLE_FAULT_ID: 100,
+
+    # Vehicle metrics
+    CHARGE_PERCENTAGE_ID: 200,
+    CHARGING_RATE_ID: 200,
+    ESTIMATED_FULL_CHARGE_TIME_ID: 200,
+    BATTERY_TEMP_ID: 200,
+    MOTOR_TEMP_ID: 200,
+    INVERTER_TEMP_ID: 200,
+    TIRE_TEMP_ID: 500,
+    TIRE_PRESSURE_ID: 500,
+    POWER_OUTPUT_ID: 100,
+    TORQUE_DISTRIBUTION_ID: 200,
+    SUSPENSION_METRICS_ID: 200,
+    G_FORCES_ID: 200,
+    BRAKE_TEMP_ID: 200,
+
+    # CAN FD metric packs (FD frame profile)
+    FD_FAST_METRICS_ID: 100,
+    FD_SLOW_METRICS_ID: 500,
+}
+
+# Transmit priority per arbitration ID: lower values go out first, and the
+# highest values are shed first when the bus is congested
+TX_PRIORITIES = {
+    VEHICLE_STATE_ID: 0,
+    VEHICLE_FAULT_ID: 0,
+    POWER_OUTPUT_ID: 1,
+    CHARGE_PERCENTAGE_ID: 2,
+    CHARGING_RATE_ID: 2,
+    ESTIMATED_FULL_CHARGE_TIME_ID: 2,
+    BATTERY_TEMP_ID: 2,
+    MOTOR_TEMP_ID: 2,
+    INVERTER_TEMP_ID: 2,
+    TORQUE_DISTRIBUTION_ID: 2,
+    SUSPENSION_METRICS_ID: 2,
+    G_FORCES_ID: 2,
+    BRAKE_TEMP_ID: 2,
+    TIRE_TEMP_ID: 3,
+    TIRE_PRESSURE_ID: 3,
+    FD_FAST_METRICS_ID: 1,
+    FD_SLOW_METRICS_ID: 3,
+}
+DEFAULT_TX_PRIORITY = 2
+
+# Transmit queue limits
+TX_QUEUE_MAX_DEPTH = 64       # pending frames (one per ID after coalescing)
+TX_MAX_RETRIES = 5            # consecutive ENOBUFS failures before shedding
+TX_BACKOFF_INITIAL = 0.001    # seconds, doubled on each retry
+TX_BACKOFF_MAX = 0.05         # seconds
+
+# Hand cyclic frames to the kernel's CAN_BCM periodic transmit instead of
+# sending each one from Python (python-can send_periodic)
+CYCLIC_OFFLOAD = False
+
+# Bus backend used when none is given on the command line:
+# socketcan, vcan, virtual, null or file (see src/utils/bus_backends.py)
+BUS_BACKEND = "socketcan"
+BUS_CHANNEL = None            # None selects the backend's default channel
+
+# Parsed DBC files are cached here so repeat launches skip parsing
+DBC_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vcu_sim", "dbc")
+
+# Frame profile: "classic" sends one 1-8 byte frame per metric ID, "fd" packs
+# the metrics into CAN FD frames with bit-rate switching (FD_METRIC_GROUPS)
+FRAME_PROFILE = "classic"
+
+# Bit rates used for bus-load estimates (the interface itself is configured
+# with `ip link set can0 type can bitrate ... dbitrate ... fd on`)
+NOMINAL_BITRATE = 500000
+FD_DATA_BITRATE = 2000000
+
+# Seed of the simulated values; None draws a fresh one per run (it is logged,
+# so any run can be reproduced with --seed)
+SIMULATION_SEED = None
+
+# Oscillation model: sine tables are sampled at this step (the scheduler tick,
+# i.e. the GCD of the broadcast periods) and noise is drawn in blocks of this size
+WAVEFORM_RESOLUTION_MS = reduce(math.gcd, MESSAGE_PERIODS_MS.values())
+NOISE_BLOCK_SIZE = 4096
+
+# Trace replay: frames are read ahead in chunks by a reader thread, and each
+# send sleeps until shortly before its deadline, then spins the rest
+REPLAY_CHUNK_SIZE = 256
+REPLAY_READ_AHEAD_CHUNKS = 64  # bounds memory to about 16k frames
+REPLAY_SPIN_SECONDS = 0.001  # above the kernel timer slack (50us)
+
+# Receive path: socket receive buffer (bytes) that absorbs bursts while
+# callbacks run, and how often the receiver thread checks for shutdown
+RX_SOCKET_BUFFER = 1 << 20
+RX_POLL_INTERVAL = 0.1        # seconds
+
+# Loopback measurement (main.py --measure): histogram range and bin width for
+# period deviation and enqueue-to-wire latency, and the per-ID acceptance
+# limit on the 1st/99th percentile period deviation
+MEASURE_RANGE_US = 50000
+MEASURE_BIN_US = 10
+MEASURE_JITTER_LIMIT_MS = 5.0
+MEASURE_WARMUP_SECONDS = 1.0  # startup frames excluded from the measurement
+
+# Scheduler tick durations are kept in a histogram of this range and bin
+# width (seconds)
+TICK_HISTOGRAM_RANGE = 0.1
+TICK_HISTOGRAM_BIN = 0.00005
+
+# Opt-in metrics endpoint (main.py --metrics-port): Prometheus text format
+# served on localhost only, and how often event-loop lag is sampled
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = None           # None disables the endpoint
+METRICS_LAG_INTERVAL = 0.05   # seconds
+
+# Per-ID bus.send latency histograms (log-linear, nanoseconds): values up to
+# SEND_LATENCY_MAX_NS, 2**(SUB_BITS - 1) buckets per power of two (~6% wide)
+SEND_LATENCY_MAX_NS = 1 << 34  # about 17 s
+SEND_LATENCY_SUB_BITS = 5
+
+# Logging: records are written by a background thread; repeats of the same
+# send error (per ID and errno) are counted and summarised once per interval
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_SUMMARY_INTERVAL = 5.0    # seconds
@@ -0,0 +1,182 @@
+"""
+Fleet runner: many independent simulated vehicles driven by one scheduler
+"""
+import asyncio
+import logging
+import random
+import time
+from functools import partial
+import numpy as np
+from ..handlers.bus_writer import BusWriter
+from ..handlers.message_sender import MessageSender
+from ..handlers.transmit_queue import TransmitQueue
+from ..utils.can_ids import VehicleStates, VEHICLE_ID_STRIDE
+from ..utils.clock import REAL_CLOCK
+from ..utils.scheduler import DeadlineScheduler
+from .vector_engine import VectorEngine
+from ..config.settings import MESSAGE_PERIODS_MS, FRAME_PROFILE
+
+logger = logging.getLogger(__name__)
+
+# Spawn keys of the independent random streams derived from the fleet seed
+VEHICLE_STREAMS = 0
+VECTOR_ENGINE_STREAMS = 1
+
+# "scalar": each MessageSender updates itself; "vector": one VectorEngine
+# updates every vehicle in batched NumPy operations
+FLEET_ENGINES = ("scalar", "vector")
+
+# Initial states handed out to fleet vehicles
+FLEET_STATES = (
+    (VehicleStates.PARK, VehicleStates.READY, VehicleStates.SYSTEMS_CHECK_PASS | VehicleStates.BATTERY_OK),
+    (VehicleStates.DRIVE, VehicleStates.ACTIVE,
+     VehicleStates.MOTOR_READY | VehicleStates.SYSTEMS_CHECK_PASS | VehicleStates.BATTERY_OK),
+    (VehicleStates.CHARGE, VehicleStates.INITIALIZING,
+     VehicleStates.CHARGING_CONNECTED | VehicleStates.SYSTEMS_CHECK_PASS | VehicleStates.BATTERY_OK),
+)
+
+class FleetRunner:
+    """Simulate N vehicles from one process.
+
+    Each vehicle is its own MessageSender with private state and its own
+    random stream, spawned from the fleet seed by vehicle index with a NumPy
+    SeedSequence, so a seed reproduces every vehicle however the fleet is
+    sharded.
+    Vehicles are spread round-robin over the given buses (one writer thread
+    per bus); with `id_offsets` vehicle N sends on extended IDs
+    N * VEHICLE_ID_STRIDE + catalog ID so many vehicles can share a channel.
+    A single DeadlineScheduler drives every vehicle; with the "vector"
+    engine the per-tick dynamics of all vehicles are computed in one batch.
+    `codecs` (e.g. compiled from a DBC) are shared by every vehicle.
+    """
+
+    def __init__(self, vehicle_count, buses, id_offsets=True, seed=None,
+                 frame_profile=FRAME_PROFILE, periods_ms=MESSAGE_PERIODS_MS, first_index=0,
+                 engine="scalar", clock=REAL_CLOCK, codecs=None):
+        if engine not in FLEET_ENGINES:
+            raise ValueError(f"Unknown fleet engine '{engine}' (choose from {', '.join(FLEET_ENGINES)})")
+        if not buses:
+            raise ValueError("Fleet needs at least one bus")
+        if not id_offsets and first_index + vehicle_count > len(buses):
+            raise ValueError(f"{vehicle_count} vehicles on {len(buses)} channel(s) need ID offsets")
+
+        self.clock = clock
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2 ** 32)
+        per_bus = -(-vehicle_count // len(buses))
+        self.writers = []
+        for bus in buses:
+            tx_queue = TransmitQueue(bus, max_depth=max(64, per_bus * len(periods_ms)))
+            self.writers.append(BusWriter(tx_queue))
+
+        # Vehicle indices are fleet-wide so shards of one fleet never collide
+        self.vehicles = []
+        for index in range(first_index, first_index + vehicle_count):
+            state_seed, noise_seed = np.random.SeedSequence(
+                self.seed, spawn_key=(VEHICLE_STREAMS, index)).spawn(2)
+            sender = MessageSender(
+                writer=self.writers[index % len(self.writers)],
+                codecs=codecs,
+                frame_profile=frame_profile,
+                seed=noise_seed,
+                clock=clock,
+                id_offset=index * VEHICLE_ID_STRIDE if id_offsets else 0,
+                is_extended_id=id_offsets
+            )
+            choice = np.random.default_rng(state_seed).integers(len(FLEET_STATES))
+            state, substate, flags = FLEET_STATES[choice]
+            sender.current_state = state
+            sender.current_substate = substate
+            sender.status_flags = flags
+            self.vehicles.append(sender)
+
+        self.scheduler = DeadlineScheduler(periods_ms, clock)
+        self.engine = None
+        if engine == "vector":
+            self.engine = VectorEngine(vehicle_count, seed=np.random.SeedSequence(
+                self.seed, spawn_key=(VECTOR_ENGINE_STREAMS, first_index)), clock=clock)
+            self.engine.set_states(v.current_state for v in self.vehicles)
+            for row, vehicle in enumerate(self.vehicles):
+                vehicle.current_values = self.engine.view(row)
+            self.scheduler.add_tick_hook(self.engine.step)
+        else:
+            self.scheduler.add_tick_hook(self._update_all)
+        self._senders = {}
+        for arbitration_id in self.vehicles[0].cyclic_senders():
+            self._senders[arbitration_id] = [v.cyclic_senders()[arbitration_id] for v in self.vehicles]
+            self.scheduler.register(arbitration_id, partial(self._send_all, arbitration_id))
+
+        self.running = False
+        self.on_report = None  # callback(report) for periodic stats; logged if unset
+        self._started_at = None
+        self._cpu_started_at = None
+        logger.info(f"Fleet of {vehicle_count} vehicles on {len(buses)} bus(es), "
+                    f"{engine} engine, seed {self.seed}")
+
+    def _update_all(self):
+        for vehicle in self.vehicles:
+            vehicle.update_dynamic_values()
+
+    def _send_all(self, arbitration_id):
+        for send in self._senders[arbitration_id]:
+            send()
+
+    async def run(self, duration=None, report_interval=10.0, start_time=None):
+        """Broadcast for `duration` seconds (or until stop()), reporting stats periodically.
+
+        `duration` and `start_time` are on the fleet clock; `start_time` is
+        an optional deadline for the first tick, shared between processes to
+        keep shards in step.
+        """
+        for writer in self.writers:
+            if self.clock.paced:
+                writer.start()
+            else:
+                writer.start_inline()
+        self.running = True
+        start_time = start_time if start_time is not None else self.clock.now()
+        self._started_at = time.monotonic() + max(0.0, start_time - self.clock.now())
+        self._cpu_started_at = time.process_time()
+        end = None if duration is None else start_time + duration
+        reporter = asyncio.create_task(self._report_periodically(report_interval))
+        try:
+            await self.scheduler.run(lambda: self.running and (end is None or self.clock.now() < end),
+                                     start_time=start_time)
+        finally:
+            self.running = False
+            reporter.cancel()
+
+    def stop(self):
+        """Stop broadcasting after the current tick"""
+        self.running = False
+
+    async def _report_periodically(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            if self.on_report is not None:
+                self.on_report(self.report())
+            else:
+                logger.info(f"Fleet stats: {self.report()}")
+
+    def report(self):
+        """Aggregate frames per second and CPU cost per vehicle"""
+        elapsed = max(0.0, time.monotonic() - self._started_at) if self._started_at else 0.0
+        cpu = time.process_time() - self._cpu_started_at if self._cpu_started_at else 0.0
+        frames = sum(w.tx_queue.sent for w in self.writers)
+        cpu_share = cpu / elapsed if elapsed else 0.0
+        return {
+            "vehicles": len(self.vehicles),
+            "elapsed_s": round(elapsed, 2),
+            "frames_sent": frames,
+            "frames_per_second": round(frames / elapsed, 1) if elapsed else 0.0,
+            "cpu_percent": round(cpu_share * 100, 1),
+            "cpu_percent_per_vehicle": round(cpu_share * 100 / len(self.vehicles), 4),
+            "vehicles_per_core": int(len(self.vehicles) / cpu_share) if cpu_share else None,
+            "ticks_skipped": self.scheduler.ticks_skipped,
+            "frames_shed": sum(w.tx_queue.shed for w in self.writers),
+        }
+
+    def shutdown(self):
+        """Flush and stop the writer threads and release the buses"""
+        for writer in self.writers:
+            if writer.stop():
+                writer.tx_queue.bus.shutdown()
@@ -0,0 +1,172 @@
+"""
+Multi-process fleet: shard vehicles over worker processes, one per core
+"""
+import asyncio
+import logging
+import multiprocessing
+import queue
+import random
+import signal
+import time
+from .runner import FleetRunner
+from ..utils.bus_backends import create_bus
+from ..config.settings import FRAME_PROFILE
+
+logger = logging.getLogger(__name__)
+
+# Seconds between spawning the workers and the shared first tick, long
+# enough for every worker to open its buses and build its vehicles
+START_LEAD_TIME = 2.0
+STOP_POLL_INTERVAL = 0.1
+
+def shard_ranges(vehicle_count, workers):
+    """Split vehicle indices into `workers` contiguous (first, count) ranges"""
+    base, extra = divmod(vehicle_count, workers)
+    ranges, first = [], 0
+    for worker in range(workers):
+        count = base + (1 if worker < extra else 0)
+        if count:
+            ranges.append((first, count))
+        first += count
+    return ranges
+
+def _run_shard(shard, first_index, count, options, start_time, stop_event, stats_queue):
+    """Worker process: run one FleetRunner shard on its own buses and scheduler"""
+    # Ctrl-C reaches the whole process group; only the coordinator handles it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    fleet = None
+    try:
+        fd = options["frame_profile"] == "fd"
+        buses = [create_bus(options["backend"], channel, fd=fd) for channel in options["channels"]]
+        fleet = FleetRunner(count, buses, id_offsets=options["id_offsets"], seed=options["seed"],
+                            frame_profile=options["frame_profile"], first_index=first_index,
+                            engine=options["engine"])
+        fleet.on_report = lambda report: stats_queue.put((shard, report))
+        asyncio.run(_run_until_stopped(fleet, options, start_time, stop_event))
+    except Exception as e:
+        logger.error(f"Fleet shard {shard} failed: {e}")
+    finally:
+        if fleet is not None:
+            fleet.shutdown()
+            stats_queue.put((shard, fleet.report()))
+
+async def _run_until_stopped(fleet, options, start_time, stop_event):
+    """Run a shard until its duration ends or the coordinator sets `stop_event`"""
+    async def watch():
+        while not stop_event.is_set():
+            await asyncio.sleep(STOP_POLL_INTERVAL)
+        fleet.stop()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        await fleet.run(options["duration"], options["report_interval"], start_time=start_time)
+    finally:
+        watcher.cancel()
+
+def aggregate_reports(reports):
+    """Combine per-shard FleetRunner reports into one fleet-wide report"""
+    reports = list(reports)
+    if not reports:
+        return {}
+    vehicles = sum(r["vehicles"] for r in reports)
+    cpu_percent = sum(r["cpu_percent"] for r in reports)
+    return {
+        "shards": len(reports),
+        "vehicles": vehicles,
+        "elapsed_s": max(r["elapsed_s"] for r in reports),
+        "frames_sent": sum(r["frames_sent"] for r in reports),
+        "frames_per_second": round(sum(r["frames_per_second"] for r in reports), 1),
+        "cpu_percent": round(cpu_percent, 1),
+        "cpu_percent_per_vehicle": round(cpu_percent / vehicles, 4) if vehicles else 0.0,
+        "vehicles_per_core": int(vehicles * 100 / cpu_percent) if cpu_percent else None,
+        "ticks_skipped": sum(r["ticks_skipped"] for r in reports),
+        "frames_shed": sum(r["frames_shed"] for r in reports),
+    }
+
+
+class ShardedFleet:
+    """Coordinate a fleet split over worker processes.
+
+    Each worker owns a contiguous range of vehicle indices and runs its own
+    FleetRunner, scheduler and bus handles, so per-vehicle simulation and
+    encoding scale across cores instead of contending for one GIL. Vehicle
+    indices (and so ID offsets and RNG streams) are fleet-wide, which makes
+    a sharded run send the same traffic as a single-process one. All
+    workers anchor their scheduler grid on one shared time.monotonic()
+    deadline so the shards tick in step. Workers push their stats to the
+    coordinator, which aggregates them.
+    """
+
+    def __init__(self, vehicle_count, workers, backend, channels=(None,), id_offsets=True, seed=None,
+                 frame_profile=FRAME_PROFILE, engine="scalar"):
+        if workers < 1:
+            raise ValueError("Sharded fleet needs at least one worker")
+        if not id_offsets and vehicle_count > len(channels):
+            raise ValueError(f"{vehicle_count} vehicles on {len(channels)} channel(s) need ID offsets")
+        self.vehicle_count = vehicle_count
+        self.shards = shard_ranges(vehicle_count, workers)
+        self.options = {
+            "backend": backend,
+            "channels": list(channels),
+            "id_offsets": id_offsets,
+            # Every worker must derive its vehicle RNGs from the same seed
+            "seed": seed if seed is not None else random.SystemRandom().randrange(2 ** 32),
+            "frame_profile": frame_profile,
+            "engine": engine,
+        }
+        self.stop_event = multiprocessing.Event()
+        self.stats_queue = multiprocessing.Queue()
+        self.processes = []
+        self.reports = {}
+        logger.info(f"Sharded fleet of {vehicle_count} vehicles over {len(self.shards)} worker(s), "
+                    f"seed {self.options['seed']}")
+
+    def run(self, duration=None, report_interval=10.0):
+        """Start the workers, aggregate their stats and wait for them to finish"""
+        options = dict(self.options, duration=duration, report_interval=report_interval)
+        start_time = time.monotonic() + START_LEAD_TIME
+        for shard, (first_index, count) in enumerate(self.shards):
+            process = multiprocessing.Process(
+                target=_run_shard,
+                name=f"fleet-shard-{shard}",
+                args=(shard, first_index, count, options, start_time, self.stop_event, self.stats_queue),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+        next_report = start_time + report_interval
+        while any(p.is_alive() for p in self.processes):
+            self._collect(timeout=STOP_POLL_INTERVAL)
+            if time.monotonic() >= next_report:
+                next_report += report_interval
+                if self.reports:
+                    logger.info(f"Fleet stats: {self.report()}")
+        self._collect(timeout=0)
+
+    def _collect(self, timeout):
+        """Pull pending shard reports off the stats queue"""
+        try:
+            while True:
+                shard, report = self.stats_queue.get(timeout=timeout)
+                self.reports[shard] = report
+                timeout = 0
+        except queue.Empty:
+            pass
+
+    def stop(self, timeout=5.0):
+        """Ask every worker to stop and wait for their final reports"""
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            while process.is_alive() and time.monotonic() < deadline:
+                self._collect(timeout=STOP_POLL_INTERVAL)
+            if process.is_alive():
+                logger.warning(f"Terminating unresponsive {process.name}")
+                process.terminate()
+            process.join()
+        self._collect(timeout=0)
+
+    def report(self):
+        """Fleet-wide stats aggregated from the latest report of every shard"""
+        return aggregate_reports(self.reports.values())
@@ -0,0 +1,163 @@
+"""
+Batched vehicle dynamics: every fleet vehicle's signals in one NumPy array
+"""
+import numpy as np
+from ..utils.can_ids import VehicleStates
+from ..utils.clock import REAL_CLOCK
+
+# Columns of the vehicles x signals value array
+CHARGE, BATTERY_TEMP, MOTOR_TEMP, POWER = 0, 1, 2, 3
+TIRE_TEMPS = slice(4, 8)
+TIRE_PRESSURES = slice(8, 12)
+SIGNAL_COUNT = 12
+
+# current_values key -> column (int) or columns (slice)
+COLUMNS = {
+    "charge_percent": CHARGE,
+    "battery_temp": BATTERY_TEMP,
+    "motor_temp": MOTOR_TEMP,
+    "power_output": POWER,
+    "tire_temps": TIRE_TEMPS,
+    "tire_pressures": TIRE_PRESSURES,
+}
+
+# State bands: DRIVE, CHARGE and everything else behave differently
+OTHER_BAND, DRIVE_BAND, CHARGE_BAND = 0, 1, 2
+BAND_OF_STATE = {VehicleStates.DRIVE: DRIVE_BAND, VehicleStates.CHARGE: CHARGE_BAND}
+CHARGE_RATES = (0.0, -0.01, 0.05)
+
+def _oscillator_table():
+    """Per-column (period, phase, noise) of the oscillating signals"""
+    period = np.ones(SIGNAL_COUNT)
+    phase = np.zeros(SIGNAL_COUNT)
+    noise = np.zeros(SIGNAL_COUNT)
+    period[BATTERY_TEMP], noise[BATTERY_TEMP] = 300, 0.05
+    period[MOTOR_TEMP], phase[MOTOR_TEMP], noise[MOTOR_TEMP] = 120, 45, 0.2
+    period[POWER], noise[POWER] = 30, 0.3
+    period[TIRE_TEMPS], phase[TIRE_TEMPS], noise[TIRE_TEMPS] = 180, np.arange(4) * 45, 0.1
+    period[TIRE_PRESSURES], phase[TIRE_PRESSURES], noise[TIRE_PRESSURES] = 240, np.arange(4) * 60, 0.05
+    return 2 * np.pi / period, phase, noise
+
+def _band_limits():
+    """(3, SIGNAL_COUNT) min/max of every oscillating signal per state band.
+
+    Mirrors MessageSender.update_dynamic_values, including its CHARGE power
+    band whose min is above its max (the clamp then pins it to the min).
+    """
+    ranges = VehicleStates.NOMINAL_RANGES
+    low = np.zeros((3, SIGNAL_COUNT))
+    high = np.zeros((3, SIGNAL_COUNT))
+    low[:, BATTERY_TEMP], high[:, BATTERY_TEMP] = ranges["battery_temp"]
+
+    motor_low, motor_high = ranges["motor_temp"]
+    low[:, MOTOR_TEMP], high[:, MOTOR_TEMP] = motor_low, motor_low + 20
+    low[DRIVE_BAND, MOTOR_TEMP], high[DRIVE_BAND, MOTOR_TEMP] = motor_low + 15, motor_high - 5
+
+    power_low, power_high = ranges["power_output"]
+    high[DRIVE_BAND, POWER] = power_high * 0.8
+    low[CHARGE_BAND, POWER], high[CHARGE_BAND, POWER] = power_low * 0.3, power_low * 0.8
+
+    tire_base = ranges["tire_temps"][0] + 10
+    low[:, TIRE_TEMPS], high[:, TIRE_TEMPS] = tire_base, tire_base + 20
+    low[DRIVE_BAND, TIRE_TEMPS], high[DRIVE_BAND, TIRE_TEMPS] = tire_base + 15, tire_base + 35
+
+    pressure_base = sum(ranges["tire_pressures"]) / 2
+    low[:, TIRE_PRESSURES], high[:, TIRE_PRESSURES] = pressure_base - 1, pressure_base + 1
+    return low, high
+
+
+class VehicleValues:
+    """`current_values`-style view of one vehicle's row in a VectorEngine"""
+
+    __slots__ = ("engine", "row")
+
+    def __init__(self, engine, row):
+        self.engine = engine
+        self.row = row
+
+    def __getitem__(self, key):
+        return self.engine.rows[self.row][COLUMNS[key]]
+
+    def __setitem__(self, key, value):
+        self.engine.set_value(self.row, key, value)
+
+
+class VectorEngine:
+    """Simulate the dynamic values of many vehicles in a few array operations.
+
+    Values live in a vehicles x signals float array. Each tick computes the
+    sine bases once for all columns, draws the noise for the whole fleet in
+    one call and clamps against per-vehicle band limits, so the Python work
+    per tick is constant rather than per vehicle. The behaviour per state
+    (DRIVE/CHARGE/other bands, charge drift, tire pressure following tire
+    temperature) matches MessageSender.update_dynamic_values.
+
+    Senders read their row through `VehicleValues`; the row values are
+    converted to Python floats once per tick so encoding stays cheap.
+    """
+
+    def __init__(self, vehicle_count, seed=None, clock=REAL_CLOCK):
+        self.clock = clock
+        self.rng = np.random.default_rng(seed)
+        self.values = np.zeros((vehicle_count, SIGNAL_COUNT))
+        self.values[:, CHARGE] = 80
+        self.values[:, BATTERY_TEMP] = 25
+        self.values[:, MOTOR_TEMP] = 40
+        self.values[:, TIRE_TEMPS] = 35
+        self.values[:, TIRE_PRESSURES] = 32
+        self.states = np.zeros(vehicle_count, dtype=np.int64)
+        self.faults = np.zeros(vehicle_count, dtype=bool)
+        self.omega, self.phase, self.noise = _oscillator_table()
+        self.band_low, self.band_high = _band_limits()
+        self._refresh_bands()
+        self.rows = self.values.tolist()
+        self.start_time = self.clock.now()
+
+    def set_state(self, row, state):
+        """Move one vehicle to a new vehicle state"""
+        self.states[row] = BAND_OF_STATE.get(state, OTHER_BAND)
+        self._refresh_bands()
+
+    def set_states(self, states):
+        """Set the vehicle state of every vehicle at once"""
+        self.states[:] = [BAND_OF_STATE.get(state, OTHER_BAND) for state in states]
+        self._refresh_bands()
+
+    def set_fault(self, row, present):
+        """Freeze (or release) one vehicle's values while a fault is present"""
+        self.faults[row] = present
+
+    def set_value(self, row, key, value):
+        """Overwrite one vehicle's signal(s), e.g. to inject a fault value"""
+        self.values[row, COLUMNS[key]] = value
+        self.rows[row] = self.values[row].tolist()
+
+    def view(self, row):
+        """Mapping over one vehicle's values, usable as MessageSender.current_values"""
+        return VehicleValues(self, row)
+
+    def _refresh_bands(self):
+        """Recompute per-vehicle limits, midpoints and amplitudes after state changes"""
+        self.low = self.band_low[self.states]
+        self.high = self.band_high[self.states]
+        self.mid = (self.high + self.low) / 2
+        self.amplitude = (self.high - self.low) / 2
+        self.noise_scale = self.noise * self.amplitude
+        self.charge_rate = np.take(CHARGE_RATES, self.states)
+
+    def step(self):
+        """Advance every vehicle by one tick"""
+        elapsed = self.clock.now() - self.start_time
+        base = self.mid + self.amplitude * np.sin((elapsed + self.phase) * self.omega)
+        noise = self.rng.uniform(-1.0, 1.0, self.values.shape) * self.noise_scale
+        # max(low, min(high, x)) rather than np.clip to keep the scalar
+        # semantics for inverted bands
+        new = np.maximum(self.low, np.minimum(self.high, base + noise))
+        new[:, TIRE_PRESSURES] += (new[:, TIRE_TEMPS] - self.low[:, TIRE_TEMPS]) * 0.1
+        charge_low, charge_high = VehicleStates.NOMINAL_RANGES["charge_percent"]
+        new[:, CHARGE] = np.clip(self.values[:, CHARGE] + self.charge_rate, charge_low, charge_high)
+
+        if self.faults.any():
+            new[self.faults] = self.values[self.faults]
+        self.values = new
+        self.rows = new.tolist()
@@ -0,0 +1,164 @@
+"""
+Single-writer transmit thread that owns the CAN bus
+"""
+import logging
+from array import array
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+def percentiles(samples, points=(50, 90, 99, 99.9)):
+    """Nearest-rank percentiles of a sample sequence"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    last = len(ordered) - 1
+    return {p: ordered[min(last, int(round(p / 100.0 * last)))] for p in points}
+
+
+class BusWriter(threading.Thread):
+    """Drain a TransmitQueue to the bus from one dedicated thread.
+
+    Producers (the scheduler and keyboard handling on the event loop) only
+    append to a `queue.SimpleQueue`, which never blocks on socket I/O. The
+    writer moves frames into the coalescing priority queue, sends them and
+    waits on the inbox through ENOBUFS backoffs so newer frames can still
+    replace stale ones. Enqueue-to-wire latency is sampled for every frame.
+
+    Senders reuse one cached frame per ID, so `submit` snapshots the payload
+    and the transmit queue sends it from a frame only the writer touches:
+    what goes out is what was submitted, never a half-updated frame.
+
+    If the thread is never started (unpaced virtual-clock runs, where the
+    producer would otherwise outrun it and coalesce away frames), `submit`
+    sends from the submitting thread instead. It never sleeps there: during
+    an ENOBUFS backoff frames stay queued (and coalesce) until a submit
+    after the backoff sends them.
+    """
+
+    def __init__(self, tx_queue, latency_samples=100000):
+        super().__init__(name="can-bus-writer", daemon=True)
+        self.tx_queue = tx_queue
+        self.tx_queue.on_sent = self._record_latency
+        self.inbox = queue.SimpleQueue()
+        # Preallocated ring of the most recent latency samples (seconds)
+        self.latencies = array("d", bytes(8 * latency_samples))
+        self.latency_count = 0
+        self._flush_waiters = []
+        self.inline = False
+        self._retry_at = None  # end of the current ENOBUFS backoff (inline mode)
+        self.on_sent = None  # optional callback(arbitration_id, enqueued_at, event) after each send
+
+    def start_inline(self):
+        """Send from the submitting thread instead of starting the writer thread"""
+        self.inline = True
+
+    def submit(self, message, event=False):
+        """Queue a frame for the writer thread; never blocks while the thread runs.
+
+        `event` marks a frame sent off the cyclic schedule (a state change,
+        a fault); it is passed on to `on_sent`.
+        """
+        if self.inline:
+            queued = self.tx_queue.put(message, time.perf_counter(), event=event)
+            self._drain_inline()
+            return queued
+        self.inbox.put((time.perf_counter(), message, bytes(message.data), event))
+        return True
+
+    def flush(self, timeout=1.0):
+        """Block until everything submitted so far has been sent or shed"""
+        if not self.is_alive():
+            return self.tx_queue.flush(timeout)
+        done = threading.Event()
+        self.inbox.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout=1.0):
+        """Send what is pending (up to `timeout`) and stop the thread.
+
+        Returns False if the thread is still running (e.g. blocked in
+        `bus.send`), in which case the bus must not be shut down yet.
+        """
+        if self.inline:
+            self.tx_queue.flush(timeout)
+        elif self.is_alive():
+            self.inbox.put(_STOP)
+            self.join(timeout)
+        if self.is_alive():
+            logger.warning(f"Bus writer did not stop within {timeout}s")
+            return False
+        # Report errors still being counted
+        self.tx_queue.error_log.flush()
+        return True
+
+    def _drain_inline(self):
+        """Send what is pending unless an ENOBUFS backoff is still running"""
+        if self._retry_at is not None and time.monotonic() < self._retry_at:
+            return
+        backoff = self.tx_queue.drain()
+        self._retry_at = None if backoff is None else time.monotonic() + backoff
+
+    def run(self):
+        retry_at = None
+        stopping = False
+        while not stopping:
+            timeout = None if retry_at is None else max(0.0, retry_at - time.monotonic())
+            try:
+                item = self.inbox.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            # Move everything waiting in the inbox into the priority queue
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    self._flush_waiters.append(item)
+                else:
+                    enqueued_at, message, data, event = item
+                    self.tx_queue.put(message, enqueued_at, data, event)
+                try:
+                    item = self.inbox.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            # Frames arriving during an ENOBUFS backoff only coalesce
+            if retry_at is not None and time.monotonic() < retry_at:
+                continue
+            try:
+                backoff = self.tx_queue.drain()
+            except Exception as e:
+                logger.error(f"Error in bus writer: {e}")
+                backoff = None
+            retry_at = None if backoff is None else time.monotonic() + backoff
+
+            if backoff is None and self._flush_waiters:
+                for waiter in self._flush_waiters:
+                    waiter.set()
+                self._flush_waiters.clear()
+
+        self.tx_queue.flush()
+        for waiter in self._flush_waiters:
+            waiter.set()
+
+    def _record_latency(self, arbitration_id, enqueued_at, event):
+        if enqueued_at is not None:
+            self.latencies[self.latency_count % len(self.latencies)] = time.perf_counter() - enqueued_at
+            self.latency_count += 1
+        if self.on_sent is not None:
+            self.on_sent(arbitration_id, enqueued_at, event)
+
+    def report(self):
+        """Enqueue-to-wire latency percentiles in microseconds"""
+        samples = self.latencies[:min(self.latency_count, len(self.latencies))]
+        if not samples:
+            return {"samples": 0}
+        summary = {f"p{p:g}_us": round(v * 1e6, 1) for p, v in percentiles(samples).items()}
+        summary["max_us"] = round(max(samples) * 1e6, 1)
+        summary["samples"] = len(samples)
+        return summary
@@ -0,0 +1,50 @@
+"""
+Kernel-side periodic transmit for cyclic frames (SocketCAN broadcast manager)
+"""
+import logging
+from can import ModifiableCyclicTaskABC
+
+logger = logging.getLogger(__name__)
+
+class CyclicOffload:
+    """Hand each cyclic arbitration ID to the bus's periodic transmit.
+
+    On socketcan buses python-can backs `send_periodic` with CAN_BCM, so the
+    kernel owns the timing and Python only refreshes payloads. Other
+    interfaces fall back to python-can's thread-based cyclic tasks.
+    """
+
+    def __init__(self, bus, periods_ms, id_offset=0):
+        self.bus = bus
+        self.periods_ms = dict(periods_ms)
+        self.id_offset = id_offset
+        self.tasks = {}
+
+    def handles(self, arbitration_id):
+        """True if frames with this (wire) ID are sent periodically by the bus"""
+        return arbitration_id - self.id_offset in self.periods_ms
+
+    def publish(self, message):
+        """Start the periodic task for this ID or update its payload in place"""
+        arbitration_id = message.arbitration_id - self.id_offset
+        task = self.tasks.get(arbitration_id)
+        if task is None:
+            period = self.periods_ms[arbitration_id] / 1000.0
+            task = self.bus.send_periodic(message, period)
+            if not isinstance(task, ModifiableCyclicTaskABC):
+                task.stop()
+                raise TypeError(f"Bus does not support modifiable periodic tasks for {hex(arbitration_id)}")
+            self.tasks[arbitration_id] = task
+            logger.info(f"Offloaded {hex(arbitration_id)} to periodic transmit every {period * 1000:.0f}ms")
+        else:
+            task.modify_data(message)
+        return True
+
+    def stop(self):
+        """Stop all periodic tasks"""
+        for arbitration_id, task in self.tasks.items():
+            try:
+                task.stop()
+            except Exception as e:
+                logger.error(f"Error stopping periodic task {hex(arbitration_id)}: {e}")
+        self.tasks.clear()
@@ -0,0 +1,38 @@
+"""
+Preallocated CAN frames, one long-lived message per arbitration ID
+"""
+import can
+
+class FrameCache:
+    """Hand out one reusable can.Message (with a bytearray payload) per ID.
+
+    Senders pack new values into `frame.data` in place with
+    `struct.pack_into`, so the steady-state send path builds no lists and no
+    new message objects. The bus writer snapshots the payload when a frame
+    is submitted, so a frame can be updated again straight away without
+    changing the one waiting to be sent.
+    """
+
+    def __init__(self, is_extended_id=False, id_offset=0):
+        self.is_extended_id = is_extended_id
+        self.id_offset = id_offset
+        self.frames = {}
+
+    def get(self, arbitration_id, dlc, is_fd=False):
+        """Cached frame for catalog ID `arbitration_id`, created on first use.
+
+        Frames go out on `arbitration_id + id_offset`, which lets several
+        simulated vehicles share one bus (fleet mode).
+        """
+        frame = self.frames.get(arbitration_id)
+        if frame is None or frame.dlc != dlc:
+            frame = can.Message(
+                arbitration_id=arbitration_id + self.id_offset,
+                data=bytearray(dlc),
+                is_extended_id=self.is_extended_id,
+                is_fd=is_fd,
+                bitrate_switch=is_fd,
+                dlc=dlc
+            )
+            self.frames[arbitration_id] = frame
+        return frame
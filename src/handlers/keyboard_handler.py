@@ -65,7 +65,8 @@ class KeyboardHandler:
                     self.message_sender.status_flags = VehicleStates.SYSTEMS_CHECK_PASS | VehicleStates.BATTERY_OK
 
                 # Send updated state message immediately
-                self.message_sender.send_state_message()
+                with self.message_sender.event_send():
+                    self.message_sender.send_state_message()
                 print(f"\nState changed to: {state_name}")
             
             return True
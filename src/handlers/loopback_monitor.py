@@ -0,0 +1,207 @@
+"""
+Loopback measurement of cyclic periods, jitter and enqueue-to-wire latency
+"""
+import collections
+import logging
+import threading
+import time
+from .message_receiver import MessageReceiver
+from ..utils.histogram import Histogram
+from ..config.settings import (MESSAGE_PERIODS_MS, MEASURE_RANGE_US, MEASURE_BIN_US,
+                               MEASURE_JITTER_LIMIT_MS, MEASURE_WARMUP_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+MATCH_WINDOW = 16
+
+class LoopbackMonitor:
+    """Time every cyclic frame as it comes back from the bus.
+
+    `rx_bus` is a second socket on the sender's interface (SocketCAN loops
+    sent frames back to the other sockets on the host; on real hardware the
+    echo comes when the controller has sent the frame). Each reception is
+    timestamped by the kernel, and per ID the monitor builds a histogram of
+    the period deviation from the schedule and one of the latency from
+    `writer.submit` to reception. Send and reception events are matched per
+    ID in order, whichever of the two threads sees its event first.
+
+    A reception counts towards the period once its send is known, so frames
+    the writer reports as event-driven (state changes, faults) are left out
+    and restart the period chain of their ID; receptions with no matching
+    send (CAN_BCM frames, or without a writer) count as cyclic. Deviations
+    and latencies outside the histogram range are counted separately rather
+    than clamped. Frames received during the first `warmup` seconds after
+    `attach` are ignored.
+    """
+
+    def __init__(self, rx_bus, writer=None, codecs=None, periods_ms=MESSAGE_PERIODS_MS,
+                 jitter_limit_ms=MEASURE_JITTER_LIMIT_MS, warmup=MEASURE_WARMUP_SECONDS):
+        self.periods_ms = dict(periods_ms)
+        self.jitter_limit_ms = jitter_limit_ms
+        self.warmup = warmup
+        self.receiver = MessageReceiver(rx_bus, codecs=codecs, ids=self.periods_ms)
+        for arbitration_id in self.periods_ms:
+            self.receiver.subscribe(arbitration_id, self._on_received)
+
+        self.lock = threading.Lock()
+        self.last_received = {}
+        self.frames = collections.Counter()
+        self.event_frames = collections.Counter()
+        # Samples outside +-MEASURE_RANGE_US, and the largest deviation including them
+        self.jitter_out_of_range = collections.Counter()
+        self.latency_out_of_range = collections.Counter()
+        self.worst_deviation_us = collections.Counter()
+        # Unmatched events per ID, bounded for frames that never get a partner
+        # (sent before the monitor was attached, lost, or sent by CAN_BCM)
+        self.sent_waiting = collections.defaultdict(lambda: collections.deque(maxlen=MATCH_WINDOW))
+        self.received_waiting = collections.defaultdict(lambda: collections.deque(maxlen=MATCH_WINDOW))
+        self.jitter = {i: Histogram(-MEASURE_RANGE_US, MEASURE_RANGE_US, MEASURE_BIN_US) for i in self.periods_ms}
+        self.latency = {i: Histogram(0, MEASURE_RANGE_US, MEASURE_BIN_US) for i in self.periods_ms}
+        # Enqueue times are perf_counter readings; receptions carry epoch timestamps
+        self._epoch_offset = time.time() - time.perf_counter()
+        self.writer = None
+        self.measure_from = None
+        if writer is not None:
+            self.attach(writer)
+
+    def attach(self, writer):
+        """Measure the frames `writer` sends after the warm-up, including enqueue-to-wire latency"""
+        self.measure_from = time.time() + self.warmup
+        self.writer = writer
+        writer.on_sent = self._on_sent
+
+    def start(self):
+        self.receiver.start()
+
+    def stop(self):
+        self.receiver.stop()
+        if self.writer is not None:
+            self.writer.on_sent = None
+
+    def _on_sent(self, arbitration_id, enqueued_at, event=False):
+        """Writer thread: a frame went to the bus"""
+        if enqueued_at is None or arbitration_id not in self.latency:
+            return
+        enqueued_at += self._epoch_offset
+        with self.lock:
+            waiting = self.received_waiting[arbitration_id]
+            # A frame cannot come back before it was queued: older receptions
+            # belong to frames this monitor never saw being sent
+            while waiting and waiting[0] < enqueued_at:
+                self._record_period(arbitration_id, waiting.popleft(), False)
+            if waiting:
+                self._record_match(arbitration_id, enqueued_at, waiting.popleft(), event)
+            else:
+                self.sent_waiting[arbitration_id].append((enqueued_at, event))
+
+    def _on_received(self, values, msg):
+        """Receiver thread: a frame came back from the bus"""
+        arbitration_id = msg.arbitration_id
+        received_at = msg.timestamp
+        # Startup frames (initial state/fault sends, first ticks) are not the schedule
+        if self.measure_from is None or received_at < self.measure_from:
+            return
+        with self.lock:
+            self.frames[arbitration_id] += 1
+            if self.writer is None:
+                self._record_period(arbitration_id, received_at, False)
+                return
+            waiting = self.sent_waiting[arbitration_id]
+            # Pair with the latest frame queued before this reception; earlier
+            # ones never came back
+            while len(waiting) > 1 and waiting[1][0] <= received_at:
+                waiting.popleft()
+            received = self.received_waiting[arbitration_id]
+            if waiting and waiting[0][0] <= received_at:
+                # Receptions still waiting are older than this send and will
+                # never be matched; count them first to keep reception order
+                while received:
+                    self._record_period(arbitration_id, received.popleft(), False)
+                enqueued_at, event = waiting.popleft()
+                self._record_match(arbitration_id, enqueued_at, received_at, event)
+            else:
+                if len(received) == received.maxlen:
+                    # Its send never showed up (e.g. a CAN_BCM frame): cyclic
+                    self._record_period(arbitration_id, received.popleft(), False)
+                received.append(received_at)
+
+    def _record_match(self, arbitration_id, enqueued_at, received_at, event):
+        latency_us = (received_at - enqueued_at) * 1e6
+        if latency_us < MEASURE_RANGE_US:
+            self.latency[arbitration_id].add(latency_us)
+        else:
+            self.latency_out_of_range[arbitration_id] += 1
+        self._record_period(arbitration_id, received_at, event)
+
+    def _record_period(self, arbitration_id, received_at, event):
+        """Period deviation of a reception from the previous one of its ID"""
+        if event:
+            # Off the schedule: the next cyclic frame starts a new period
+            self.event_frames[arbitration_id] += 1
+            self.last_received.pop(arbitration_id, None)
+            return
+        last = self.last_received.get(arbitration_id)
+        self.last_received[arbitration_id] = received_at
+        if last is None:
+            return
+        deviation_us = (received_at - last) * 1e6 - self.periods_ms[arbitration_id] * 1000
+        self.worst_deviation_us[arbitration_id] = max(self.worst_deviation_us[arbitration_id], abs(deviation_us))
+        if -MEASURE_RANGE_US <= deviation_us < MEASURE_RANGE_US:
+            self.jitter[arbitration_id].add(deviation_us)
+        else:
+            self.jitter_out_of_range[arbitration_id] += 1
+
+    def results(self):
+        """Per-ID period and latency statistics in microseconds, IDs that were seen only"""
+        results = {}
+        with self.lock:
+            for arbitration_id, period_ms in sorted(self.periods_ms.items()):
+                jitter = self.jitter[arbitration_id]
+                out_of_range = self.jitter_out_of_range[arbitration_id]
+                samples = jitter.count + out_of_range
+                if not samples:
+                    continue
+                # Out-of-range samples are beyond any limit: more than 1% of
+                # them fails the 1st/99th percentile check by themselves
+                within_limit = out_of_range <= samples / 100
+                if jitter.count:
+                    worst_ms = max(abs(jitter.percentile(1)), abs(jitter.percentile(99))) / 1000
+                    within_limit = within_limit and worst_ms <= self.jitter_limit_ms
+                results[arbitration_id] = {
+                    "period_ms": period_ms,
+                    "frames": self.frames[arbitration_id],
+                    "event_frames": self.event_frames[arbitration_id],
+                    "mean_period_ms": period_ms + jitter.mean / 1000 if jitter.count else None,
+                    "jitter_us": jitter.summary((1, 50, 99)),
+                    "jitter_out_of_range": out_of_range,
+                    "worst_deviation_us": self.worst_deviation_us[arbitration_id],
+                    "latency_us": self.latency[arbitration_id].summary((50, 99)),
+                    "latency_out_of_range": self.latency_out_of_range[arbitration_id],
+                    "within_limit": within_limit,
+                }
+        return results
+
+    def format_summary(self):
+        """Summary table of `results()`"""
+        header = (f"{'ID':>6} {'period':>7} {'frames':>7} {'events':>6} {'mean':>9} {'jit p1':>8} {'p50':>7} "
+                  f"{'p99':>7} {'max':>7} {'out':>5} {'lat p50':>8} {'p99':>7} {'max':>7} {'out':>5}  ok")
+        lines = [header, "-" * len(header)]
+        for arbitration_id, r in self.results().items():
+            jitter, latency = r["jitter_us"], r["latency_us"]
+            row = f"{arbitration_id:>#6x} {r['period_ms']:>5}ms {r['frames']:>7} {r['event_frames']:>6}"
+            if jitter["count"]:
+                row += (f" {r['mean_period_ms']:>7.3f}ms {jitter['p1']:>8.0f} {jitter['p50']:>7.0f} "
+                        f"{jitter['p99']:>7.0f}")
+            else:
+                row += f" {'-':>9} {'-':>8} {'-':>7} {'-':>7}"
+            row += f" {r['worst_deviation_us']:>7.0f} {r['jitter_out_of_range']:>5}"
+            if latency["count"]:
+                row += f" {latency['p50']:>8.0f} {latency['p99']:>7.0f} {latency['max']:>7.0f}"
+            else:
+                row += f" {'-':>8} {'-':>7} {'-':>7}"
+            row += f" {r['latency_out_of_range']:>5}"
+            lines.append(row + ("  yes" if r["within_limit"] else "  NO"))
+        lines.append(f"Jitter and latency in microseconds; events = state/fault frames left out of the "
+                     f"periods; out = samples beyond +-{MEASURE_RANGE_US} us; ok = p1/p99 jitter within "
+                     f"{self.jitter_limit_ms:g} ms")
+        return "\n".join(lines)
@@ -0,0 +1,125 @@
+"""
+Receive path: read VCU frames back off the bus and decode them with the catalog
+"""
+import logging
+import socket
+import threading
+import time
+from ..utils.can_ids import STANDARD_ID_MASK
+from ..config.settings import RX_SOCKET_BUFFER, RX_POLL_INTERVAL
+from .message_sender import CODECS
+
+logger = logging.getLogger(__name__)
+
+EXTENDED_ID_MASK = 0x1FFFFFFF
+
+def id_filters(arbitration_ids, id_offset=0, is_extended_id=False):
+    """python-can `can_filters` matching exactly these IDs (shifted by `id_offset`)"""
+    mask = EXTENDED_ID_MASK if is_extended_id else STANDARD_ID_MASK
+    return [{"can_id": id_offset + arbitration_id, "can_mask": mask, "extended": is_extended_id}
+            for arbitration_id in sorted(arbitration_ids)]
+
+
+class MessageReceiver(threading.Thread):
+    """Decode frames of the VCU catalog from a bus and dispatch them by ID.
+
+    The bus is narrowed to the catalog IDs with `can_filters`, which
+    SocketCAN applies in the kernel (other backends filter in python-can),
+    so unrelated traffic never reaches Python. A dedicated thread blocks in
+    `recv`, decodes each frame with the same codecs the sender encodes with
+    and calls the callbacks subscribed to its ID with a {signal: value}
+    mapping. The socket receive buffer is enlarged to absorb bursts while
+    callbacks run.
+
+    Callbacks run on the receiver thread and should return quickly; hand
+    slow work to a queue.
+    """
+
+    def __init__(self, bus, codecs=None, ids=None, id_offset=0, is_extended_id=False,
+                 rx_buffer_size=RX_SOCKET_BUFFER):
+        super().__init__(name="can-receiver", daemon=True)
+        self.bus = bus
+        self.codecs = codecs if codecs is not None else CODECS
+        self.ids = set(ids) if ids is not None else set(self.codecs)
+        unknown = self.ids - set(self.codecs)
+        if unknown:
+            raise ValueError(f"Message catalog has no definition for {', '.join(hex(i) for i in sorted(unknown))}")
+        self.id_offset = id_offset
+        self.callbacks = {}
+        self.latest = {}
+        self.stopping = threading.Event()
+
+        # Statistics
+        self.received = 0
+        self.decoded = 0
+        self.decode_errors = 0
+        self.callback_errors = 0
+
+        self.bus.set_filters(id_filters(self.ids, id_offset, is_extended_id))
+        self._set_receive_buffer(rx_buffer_size)
+
+    def _set_receive_buffer(self, size):
+        """Enlarge SO_RCVBUF on socket-based buses; others have no kernel queue"""
+        sock = getattr(self.bus, "socket", None)
+        if sock is None or not size:
+            return
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+        except OSError as e:
+            logger.warning(f"Could not set receive buffer to {size} bytes: {e}")
+
+    def subscribe(self, arbitration_id, callback):
+        """Call `callback(values, msg)` for every decoded frame of a catalog ID"""
+        if arbitration_id not in self.ids:
+            raise ValueError(f"{hex(arbitration_id)} is not among the received IDs")
+        self.callbacks.setdefault(arbitration_id, []).append(callback)
+
+    def dispatch(self, msg):
+        """Decode one frame and run its callbacks; returns False if it was not decoded"""
+        self.received += 1
+        arbitration_id = msg.arbitration_id - self.id_offset
+        codec = self.codecs.get(arbitration_id)
+        if codec is None or arbitration_id not in self.ids:
+            return False
+        try:
+            values = codec.decode_dict(msg.data)
+        except Exception as e:
+            self.decode_errors += 1
+            logger.error(f"Error decoding {hex(msg.arbitration_id)} ({len(msg.data)} bytes): {e}")
+            return False
+        self.decoded += 1
+        self.latest[arbitration_id] = values
+        for callback in self.callbacks.get(arbitration_id, ()):
+            try:
+                callback(values, msg)
+            except Exception as e:
+                self.callback_errors += 1
+                logger.error(f"Error in callback for {hex(arbitration_id)}: {e}")
+        return True
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                msg = self.bus.recv(timeout=RX_POLL_INTERVAL)
+            except Exception as e:
+                if not self.stopping.is_set():
+                    logger.error(f"Error receiving: {e}")
+                    time.sleep(RX_POLL_INTERVAL)
+                continue
+            if msg is not None and not msg.is_error_frame:
+                self.dispatch(msg)
+
+    def stop(self, timeout=1.0):
+        """Stop the receiver thread (returns within RX_POLL_INTERVAL)"""
+        self.stopping.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def report(self):
+        """Frame counts since start"""
+        return {
+            "received": self.received,
+            "decoded": self.decoded,
+            "decode_errors": self.decode_errors,
+            "callback_errors": self.callback_errors,
+        }
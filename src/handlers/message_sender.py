@@ -1,24 +1,85 @@
 """
 Enhanced message sender with fault detection, dynamic values, and manual fault trigger
 """
-import can
-import time
+import contextlib
 import random
-import math
 import logging
-from threading import Lock
+from functools import partial
 from ..utils.can_ids import *
+from ..utils.bus_backends import create_bus
+from ..utils.clock import REAL_CLOCK
+from ..utils.signals import compile_codecs
+from ..utils.waveforms import NoiseBlock, oscillator
+from ..config.settings import (BUS_BACKEND, BUS_CHANNEL, FRAME_PROFILE,
+                               WAVEFORM_RESOLUTION_MS, NOISE_BLOCK_SIZE)
+from .transmit_queue import TransmitQueue
+from .bus_writer import BusWriter
+from .cyclic_offload import CyclicOffload
+from .frame_cache import FrameCache
 
 logger = logging.getLogger(__name__)
 
+FRAME_PROFILES = ("classic", "fd")
+
+# Oscillation periods in seconds
+BATTERY_TEMP_PERIOD = 300   # 5-minute cycle
+MOTOR_TEMP_PERIOD = 120     # 2-minute cycle
+POWER_OUTPUT_PERIOD = 30
+TIRE_TEMP_PERIOD = 180      # 3-minute cycle
+TIRE_PRESSURE_PERIOD = 240  # 4-minute cycle
+
+# Noise samples consumed per update: battery, motor, power, 4 tire temps, 4 pressures
+NOISE_PER_UPDATE = 11
+
+# Payload encoders compiled once from the message catalog
+CODECS = compile_codecs(MESSAGE_DEFINITIONS + FD_MESSAGE_DEFINITIONS)
+
+def check_codecs(codecs, required_ids):
+    """Ensure a loaded catalog (e.g. from a DBC) fits the built-in senders"""
+    for arbitration_id in required_ids:
+        builtin = CODECS[arbitration_id]
+        codec = codecs.get(arbitration_id)
+        if codec is None:
+            raise ValueError(f"Message catalog has no definition for {hex(arbitration_id)}")
+        if len(codec.signals) != len(builtin.signals):
+            raise ValueError(f"Message {hex(arbitration_id)} has {len(codec.signals)} signals, "
+                             f"expected {len(builtin.signals)}")
+    return codecs
+
 class MessageSender:
-    def __init__(self):
-        self.bus = can.interface.Bus(channel="can0", interface="socketcan")
+    def __init__(self, bus=None, codecs=None, frame_profile=FRAME_PROFILE,
+                 seed=None, id_offset=0, is_extended_id=False, writer=None, clock=REAL_CLOCK):
+        if frame_profile not in FRAME_PROFILES:
+            raise ValueError(f"Unknown frame profile '{frame_profile}' (choose from {', '.join(FRAME_PROFILES)})")
+        self.frame_profile = frame_profile
+        if writer is not None:
+            # Shared with other senders on the same bus (fleet mode)
+            bus = writer.tx_queue.bus
+        self.bus = bus if bus is not None else create_bus(BUS_BACKEND, BUS_CHANNEL)
+        # Each sender owns its noise stream; the same seed (an int or a NumPy
+        # SeedSequence) reproduces the same simulated values
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2 ** 32)
+        self.clock = clock
+        self.id_offset = id_offset
+        self.codecs = CODECS
+        if codecs is not None:
+            self.codecs = check_codecs(codecs, list(self.cyclic_senders()) + [MOTOR_TEMP_ID])
         self.message_counter = 0
         self.current_state = VehicleStates.PARK
         self.current_substate = VehicleStates.READY
         self.status_flags = VehicleStates.SYSTEMS_CHECK_PASS | VehicleStates.BATTERY_OK
-        self.bus_lock = Lock()
+        self.frames = FrameCache(is_extended_id, id_offset)
+        self.owns_writer = writer is None
+        if self.owns_writer:
+            writer = BusWriter(TransmitQueue(self.bus))
+            if clock.paced:
+                writer.start()
+            else:
+                writer.start_inline()
+        self.writer = writer
+        self.tx_queue = writer.tx_queue
+        self.cyclic_offload = None
+        self._event_sends = 0  # > 0 while sending off the cyclic schedule (see event_send)
         
         # Fault tracking
         self.fault_present = False
@@ -37,7 +98,33 @@ class MessageSender:
         }
         
         # Track time for sine wave variations
-        self.start_time = time.time()
+        self.start_time = self.clock.now()
+        self.resolution = WAVEFORM_RESOLUTION_MS / 1000.0
+        self.oscillators = {}  # vehicle state -> oscillators for its bands
+        self.noise = NoiseBlock(self.seed, NOISE_BLOCK_SIZE)
+
+        # Physical values of each simulated metric message, in signal order
+        self.metric_sources = {
+            CHARGE_PERCENTAGE_ID: lambda: (self.current_values["charge_percent"],),
+            BATTERY_TEMP_ID: lambda: (self.current_values["battery_temp"],),
+            MOTOR_TEMP_ID: lambda: (self.current_values["motor_temp"],),
+            POWER_OUTPUT_ID: lambda: (abs(self.current_values["power_output"]),),
+            TIRE_TEMP_ID: lambda: self.current_values["tire_temps"],
+            TIRE_PRESSURE_ID: lambda: self.current_values["tire_pressures"],
+        }
+
+    @contextlib.contextmanager
+    def event_send(self):
+        """Mark frames sent inside the block as event-driven (off the cyclic schedule).
+
+        The flag travels with each frame to the writer's `on_sent` hook, so
+        measurements of the cyclic periods can leave these frames out.
+        """
+        self._event_sends += 1
+        try:
+            yield
+        finally:
+            self._event_sends -= 1
 
     def clear_fault(self):
         """Clear fault state and reset values to nominal"""
@@ -50,120 +137,111 @@ class MessageSender:
             if self.current_values["motor_temp"] > VehicleStates.NOMINAL_RANGES["motor_temp"][1]:
                 self.current_values["motor_temp"] = VehicleStates.NOMINAL_RANGES["motor_temp"][1] - 5
                 
-            # Send normal motor temp
-            self.send_motor_temp()
-            
-            # Send updated state message
-            self.send_state_message()
+            with self.event_send():
+                # Send normal motor temp
+                self.send_metric_update(MOTOR_TEMP_ID)
+
+                # Send updated state message
+                self.send_state_message()
             
             return True
         except Exception as e:
             logger.error(f"Error clearing fault: {e}")
             return False
 
-    def update_dynamic_values(self):
-        """Update all simulated values based on current state with smooth variations"""
+    def build_oscillators(self, state):
+        """Oscillators for the value bands of a vehicle state"""
         ranges = VehicleStates.NOMINAL_RANGES
-        current_time = time.time() - self.start_time
-        
-        def oscillate(min_val, max_val, period, phase=0, noise=0.1):
-            """Create smooth oscillation between min and max with optional noise"""
-            mid = (max_val + min_val) / 2
-            amplitude = (max_val - min_val) / 2
-            base = mid + amplitude * math.sin((current_time + phase) * (2 * math.pi / period))
-            noise_val = random.uniform(-noise, noise) * amplitude
-            return max(min_val, min(max_val, base + noise_val))
+        resolution = self.resolution
 
-        # Skip updates if fault is present
-        if self.fault_present:
-            return
-
-        # Battery charge decreases very slowly when in DRIVE/TRACK, increases in CHARGE
-        charge_rate = 0
-        if self.current_state == VehicleStates.DRIVE:
-            charge_rate = -0.01  # Slow decrease
-        elif self.current_state == VehicleStates.CHARGE:
-            charge_rate = 0.05   # Faster increase
-        
-        self.current_values["charge_percent"] = max(
-            ranges["charge_percent"][0],
-            min(ranges["charge_percent"][1],
-                self.current_values["charge_percent"] + charge_rate
-            )
-        )
-
-        # Battery temp oscillates slowly, affected by charging/driving
-        base_batt_temp = ranges["battery_temp"][0] + 10
-        if self.current_state in [VehicleStates.DRIVE, VehicleStates.CHARGE]:
-            base_batt_temp += 5
-        
-        self.current_values["battery_temp"] = oscillate(
-            ranges["battery_temp"][0],
-            ranges["battery_temp"][1],
-            period=300,  # 5-minute cycle
-            noise=0.05
-        )
+        # Battery temp oscillates slowly over its nominal range
+        battery = oscillator(*ranges["battery_temp"], BATTERY_TEMP_PERIOD,
+                             noise=0.05, resolution=resolution)
 
         # Motor temp varies more quickly, especially in DRIVE/TRACK
         motor_temp_range = ranges["motor_temp"]
-        if self.current_state == VehicleStates.DRIVE:
+        if state == VehicleStates.DRIVE:
             motor_temp_min = motor_temp_range[0] + 15
             motor_temp_max = motor_temp_range[1] - 5
         else:
             motor_temp_min = motor_temp_range[0]
             motor_temp_max = motor_temp_range[0] + 20
-        
-        self.current_values["motor_temp"] = oscillate(
-            motor_temp_min,
-            motor_temp_max,
-            period=120,  # 2-minute cycle
-            phase=45,
-            noise=0.2
-        )
+        motor = oscillator(motor_temp_min, motor_temp_max, MOTOR_TEMP_PERIOD,
+                           phase=45, noise=0.2, resolution=resolution)
 
         # Power output varies based on state
         power_range = ranges["power_output"]
-        if self.current_state == VehicleStates.DRIVE:
+        if state == VehicleStates.DRIVE:
             power_min = 0
             power_max = power_range[1] * 0.8
-        elif self.current_state == VehicleStates.CHARGE:
+        elif state == VehicleStates.CHARGE:
             power_min = power_range[0] * 0.3
             power_max = power_range[0] * 0.8
         else:
             power_min = power_max = 0
-        
-        self.current_values["power_output"] = oscillate(
-            power_min,
-            power_max,
-            period=30,
-            noise=0.3
-        )
+        power = oscillator(power_min, power_max, POWER_OUTPUT_PERIOD, noise=0.3, resolution=resolution)
 
         # Tire temperatures vary based on driving state
         base_tire_temp = ranges["tire_temps"][0] + 10
-        if self.current_state == VehicleStates.DRIVE:
+        if state == VehicleStates.DRIVE:
             base_tire_temp += 15
+        tire_temps = tuple(
+            oscillator(base_tire_temp, base_tire_temp + 20, TIRE_TEMP_PERIOD,
+                       phase=i * 45, noise=0.1, resolution=resolution)
+            for i in range(4)
+        )
+
+        # Tire pressures vary slightly around the middle of their range
+        base_pressure = (ranges["tire_pressures"][0] + ranges["tire_pressures"][1]) / 2
+        tire_pressures = tuple(
+            oscillator(base_pressure - 1, base_pressure + 1, TIRE_PRESSURE_PERIOD,
+                       phase=i * 60, noise=0.05, resolution=resolution)
+            for i in range(4)
+        )
+
+        self.oscillators[state] = (battery, motor, power, tire_temps, tire_pressures)
+        return self.oscillators[state]
+
+    def update_dynamic_values(self):
+        """Update all simulated values based on current state with smooth variations"""
+        ranges = VehicleStates.NOMINAL_RANGES
+
+        # Skip updates if fault is present
+        if self.fault_present:
+            return
+
+        step = int((self.clock.now() - self.start_time) / self.resolution + 0.5)
+        noise = self.noise.take(NOISE_PER_UPDATE)
+        oscillators = self.oscillators.get(self.current_state) or self.build_oscillators(self.current_state)
+        battery, motor, power, tire_temp_oscillators, tire_pressure_oscillators = oscillators
+
+        # Battery charge decreases very slowly when in DRIVE/TRACK, increases in CHARGE
+        charge_rate = 0
+        if self.current_state == VehicleStates.DRIVE:
+            charge_rate = -0.01  # Slow decrease
+        elif self.current_state == VehicleStates.CHARGE:
+            charge_rate = 0.05   # Faster increase
         
-        for i in range(4):
-            self.current_values["tire_temps"][i] = oscillate(
-                base_tire_temp,
-                base_tire_temp + 20,
-                period=180,  # 3-minute cycle
-                phase=i * 45,
-                noise=0.1
+        self.current_values["charge_percent"] = max(
+            ranges["charge_percent"][0],
+            min(ranges["charge_percent"][1],
+                self.current_values["charge_percent"] + charge_rate
             )
+        )
+
+        self.current_values["battery_temp"] = battery.value(step, noise[0])
+        self.current_values["motor_temp"] = motor.value(step, noise[1])
+        self.current_values["power_output"] = power.value(step, noise[2])
+
+        tire_temps = self.current_values["tire_temps"]
+        for i, tire in enumerate(tire_temp_oscillators):
+            tire_temps[i] = tire.value(step, noise[3 + i])
 
         # Tire pressures vary slightly with temperature
-        base_pressure = (ranges["tire_pressures"][0] + ranges["tire_pressures"][1]) / 2
-        for i in range(4):
-            temp_effect = (self.current_values["tire_temps"][i] - base_tire_temp) * 0.1
-            self.current_values["tire_pressures"][i] = oscillate(
-                base_pressure - 1,
-                base_pressure + 1,
-                period=240,  # 4-minute cycle
-                phase=i * 60,
-                noise=0.05
-            ) + temp_effect
+        tire_pressures = self.current_values["tire_pressures"]
+        for i, tire in enumerate(tire_pressure_oscillators):
+            temp_effect = (tire_temps[i] - tire_temp_oscillators[i].low) * 0.1
+            tire_pressures[i] = tire.value(step, noise[7 + i]) + temp_effect
 
     def check_faults(self):
         """Check all values against nominal ranges and set fault flags"""
@@ -208,22 +286,11 @@ class MessageSender:
         try:
             # Send critically high motor temperature
             fault_temp = 150  # Way above the nominal max of 85°C
-            data = [
-                int(fault_temp) & 0xFF,  # Single byte for temperature
-            ]
-            
-            message = can.Message(
-                arbitration_id=MOTOR_TEMP_ID,
-                data=data,
-                is_extended_id=False,
-                dlc=1
-            )
-            
-            with self.bus_lock:
-                self.bus.send(message)
-                
+
             # Force update the stored value to trigger fault detection
             self.current_values["motor_temp"] = fault_temp
+            with self.event_send():
+                self.send_metric_update(MOTOR_TEMP_ID)
             
             # Force fault flags
             self.fault_present = True
@@ -244,30 +311,18 @@ class MessageSender:
             if self.fault_present:
                 self.fault_counter = (self.fault_counter + 1) & 0xFF
                 
-            elapsed_ms = int((time.time() - self.start_time) * 1000) & 0xFFFFFFFF
-            
-            data = [
-                self.fault_source & 0xFF,      # Byte 0: Fault source (0 if no fault)
-                self.fault_type & 0xFF,        # Byte 1: Fault type (0 if no fault)
+            elapsed_ms = round((self.clock.now() - self.start_time) * 1000) & 0xFFFFFFFF
+
+            frame = self._frame(VEHICLE_FAULT_ID)
+            self.codecs[VEHICLE_FAULT_ID].encode_into(
+                frame.data,
+                self.fault_source,                     # Byte 0: Fault source (0 if no fault)
+                self.fault_type,                       # Byte 1: Fault type (0 if no fault)
                 0x02 if self.fault_present else 0x00,  # Byte 2: Severity (0 if no fault)
-                (elapsed_ms >> 24) & 0xFF,     # Byte 3: Timestamp MSB
-                (elapsed_ms >> 16) & 0xFF,     # Byte 4: Timestamp
-                (elapsed_ms >> 8) & 0xFF,      # Byte 5: Timestamp
-                elapsed_ms & 0xFF,             # Byte 6: Timestamp LSB
-                self.fault_counter & 0xFF      # Byte 7: Fault counter
-            ]
-            
-            message = can.Message(
-                arbitration_id=VEHICLE_FAULT_ID,
-                data=data,
-                is_extended_id=False,
-                dlc=8
+                elapsed_ms,                            # Bytes 3-6: Timestamp (big endian)
+                self.fault_counter                     # Byte 7: Fault counter
             )
-            
-            with self.bus_lock:
-                self.bus.send(message)
-            
-            return True
+            return self._transmit(frame)
         except Exception as e:
             logger.error(f"Error sending fault message: {e}")
             return False
@@ -275,55 +330,68 @@ class MessageSender:
     def send_state_message(self):
         """Send vehicle state message (0x600) with basic fault flag"""
         try:
-            data = [
-                self.current_state & 0xFF,         # Byte 0: Primary state
-                self.current_substate & 0xFF,      # Byte 1: Sub-state
-                self.status_flags & 0xFF,          # Byte 2: Status flags
-                0x01 if self.fault_present else 0, # Byte 3: Fault present flag
-                (self.message_counter >> 8) & 0xFF,# Byte 4: Counter high byte
-                self.message_counter & 0xFF,       # Byte 5: Counter low byte
-                0x00,                              # Byte 6: Reserved
-                0x00                               # Byte 7: Reserved
-            ]
-            
-            message = can.Message(
-                arbitration_id=VEHICLE_STATE_ID,
-                data=data,
-                is_extended_id=False,
-                dlc=8
-            )
-            
-            with self.bus_lock:
-                self.bus.send(message)
+            frame = self._frame(VEHICLE_STATE_ID)
+            self.codecs[VEHICLE_STATE_ID].encode_into(
+                frame.data,
+                self.current_state,                 # Byte 0: Primary state
+                self.current_substate,              # Byte 1: Sub-state
+                self.status_flags,                  # Byte 2: Status flags
+                0x01 if self.fault_present else 0,  # Byte 3: Fault present flag
+                self.message_counter                # Bytes 4-5: Counter (big endian)
+            )                                       # Bytes 6-7: Reserved
             
+            queued = self._transmit(frame)
             self.message_counter = (self.message_counter + 1) % 65536
-            return True
+            return queued
             
         except Exception as e:
             logger.error(f"Error sending state message: {e}")
             return False
 
+    def enable_cyclic_offload(self, periods_ms):
+        """Send cyclic IDs from the bus's periodic transmit (CAN_BCM on socketcan)"""
+        cyclic_ids = self.cyclic_senders().keys()
+        periods = {i: periods_ms[i] for i in cyclic_ids if i in periods_ms}
+        self.cyclic_offload = CyclicOffload(self.bus, periods, self.id_offset)
+
+    def shutdown(self):
+        """Stop periodic tasks, flush queued frames and release the bus (if not shared and the writer stopped)"""
+        if self.cyclic_offload is not None:
+            self.cyclic_offload.stop()
+        if self.owns_writer and self.writer.stop():
+            self.bus.shutdown()
+
+    def _transmit(self, message):
+        """Hand a frame to the periodic task or the bus writer thread"""
+        if self.cyclic_offload is not None and self.cyclic_offload.handles(message.arbitration_id):
+            return self.cyclic_offload.publish(message)
+        return self.writer.submit(message, event=self._event_sends > 0)
+
     def send_can_message(self, arbitration_id, data, is_extended_id=False):
         """Generic method to send CAN messages"""
         try:
-            message = can.Message(
-                arbitration_id=arbitration_id,
-                data=data,
-                is_extended_id=False,
-                dlc=len(data)
-            )
-            with self.bus_lock:
-                self.bus.send(message)
-            return True
+            frame = self.frames.get(arbitration_id, len(data))
+            frame.data[:] = bytes(data)
+            return self._transmit(frame)
         except Exception as e:
             logger.error(f"Error sending message {hex(arbitration_id)}: {e}")
             return False
 
+    def _frame(self, arbitration_id):
+        """Cached frame sized for the catalog definition of `arbitration_id`"""
+        return self.frames.get(arbitration_id, self.codecs[arbitration_id].length,
+                               is_fd=arbitration_id in FD_METRIC_GROUPS)
+
+    def _send_signals(self, arbitration_id, *values):
+        """Encode physical values into the cached frame for an ID and send it"""
+        frame = self._frame(arbitration_id)
+        self.codecs[arbitration_id].encode_into(frame.data, *values)
+        return self._transmit(frame)
+
     def send_charge_percentage(self):
         """Send battery charge percentage"""
         try:
-            data = [int(self.current_values["charge_percent"])]
-            return self.send_can_message(CHARGE_PERCENTAGE_ID, data)
+            return self._send_signals(CHARGE_PERCENTAGE_ID, self.current_values["charge_percent"])
         except Exception as e:
             logger.error(f"Error sending charge percentage: {e}")
             return False
@@ -331,8 +399,7 @@ class MessageSender:
     def send_motor_temp(self):
         """Send motor temperature"""
         try:
-            data = [int(self.current_values["motor_temp"])]
-            return self.send_can_message(MOTOR_TEMP_ID, data)
+            return self._send_signals(MOTOR_TEMP_ID, self.current_values["motor_temp"])
         except Exception as e:
             logger.error(f"Error sending motor temp: {e}")
             return False
@@ -340,31 +407,82 @@ class MessageSender:
     def send_battery_temp(self):
         """Send battery temperature"""
         try:
-            data = [int(self.current_values["battery_temp"])]
-            return self.send_can_message(BATTERY_TEMP_ID, data)
+            return self._send_signals(BATTERY_TEMP_ID, self.current_values["battery_temp"])
         except Exception as e:
             logger.error(f"Error sending battery temp: {e}")
             return False
 
     def send_tire_data(self):
         """Send tire temperatures and pressures"""
+        temp_success = self.send_tire_temps()
+        pressure_success = self.send_tire_pressures()
+        return temp_success and pressure_success
+
+    def send_tire_temps(self):
+        """Send tire temperatures"""
         try:
-            temp_data = [int(t) for t in self.current_values["tire_temps"]]
-            pressure_data = [int(p) for p in self.current_values["tire_pressures"]]
-            
-            temp_success = self.send_can_message(TIRE_TEMP_ID, temp_data)
-            pressure_success = self.send_can_message(TIRE_PRESSURE_ID, pressure_data)
-            
-            return temp_success and pressure_success
+            return self._send_signals(TIRE_TEMP_ID, *self.current_values["tire_temps"])
         except Exception as e:
-            logger.error(f"Error sending tire data: {e}")
+            logger.error(f"Error sending tire temps: {e}")
+            return False
+
+    def send_tire_pressures(self):
+        """Send tire pressures"""
+        try:
+            return self._send_signals(TIRE_PRESSURE_ID, *self.current_values["tire_pressures"])
+        except Exception as e:
+            logger.error(f"Error sending tire pressures: {e}")
             return False
 
     def send_power_output(self):
         """Send power output"""
         try:
-            data = [int(abs(self.current_values["power_output"]))]
-            return self.send_can_message(POWER_OUTPUT_ID, data)
+            return self._send_signals(POWER_OUTPUT_ID, abs(self.current_values["power_output"]))
         except Exception as e:
             logger.error(f"Error sending power output: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def send_fd_metrics(self, arbitration_id):
+        """Send one CAN FD frame packing several metric messages (FD profile)"""
+        try:
+            values = []
+            for member_id in FD_METRIC_GROUPS[arbitration_id]:
+                source = self.metric_sources.get(member_id)
+                if source is not None:
+                    values.extend(source())
+                else:
+                    # Metrics the simulator does not model yet are sent as zero
+                    values.extend([0] * len(self.codecs[member_id].signals))
+            return self._send_signals(arbitration_id, *values)
+        except Exception as e:
+            logger.error(f"Error sending FD metrics {hex(arbitration_id)}: {e}")
+            return False
+
+    def send_metric_update(self, arbitration_id):
+        """Send the frame carrying one metric in the active frame profile"""
+        if self.frame_profile == "fd":
+            for fd_id, member_ids in FD_METRIC_GROUPS.items():
+                if arbitration_id in member_ids:
+                    return self.send_fd_metrics(fd_id)
+        return self.cyclic_senders()[arbitration_id]()
+
+    def cyclic_senders(self):
+        """Map each cyclically broadcast arbitration ID to its send method"""
+        if self.frame_profile == "fd":
+            senders = {
+                VEHICLE_STATE_ID: self.send_state_message,
+                VEHICLE_FAULT_ID: self.send_fault_message,
+            }
+            for fd_id in FD_METRIC_GROUPS:
+                senders[fd_id] = partial(self.send_fd_metrics, fd_id)
+            return senders
+        return {
+            VEHICLE_STATE_ID: self.send_state_message,
+            VEHICLE_FAULT_ID: self.send_fault_message,
+            POWER_OUTPUT_ID: self.send_power_output,
+            CHARGE_PERCENTAGE_ID: self.send_charge_percentage,
+            BATTERY_TEMP_ID: self.send_battery_temp,
+            MOTOR_TEMP_ID: self.send_motor_temp,
+            TIRE_TEMP_ID: self.send_tire_temps,
+            TIRE_PRESSURE_ID: self.send_tire_pressures,
+        }
@@ -0,0 +1,152 @@
+"""
+Opt-in Prometheus metrics endpoint for the transmit path and the scheduler
+"""
+import asyncio
+import logging
+import time
+from ..utils.histogram import Histogram
+from ..config.settings import METRICS_HOST, METRICS_LAG_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket bounds in seconds (bin edges of the underlying histograms)
+DURATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+LAG_RANGE = 1.0
+LAG_BIN = 0.00005
+REQUEST_TIMEOUT = 5.0
+
+def _format_histogram(name, histogram, buckets):
+    lines = [f'{name}_bucket{{le="{bound:g}"}} {count}'
+             for bound, count in zip(buckets, histogram.cumulative(buckets))]
+    lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum {histogram.total:.6f}")
+    lines.append(f"{name}_count {histogram.count}")
+    return lines
+
+
+class MetricsServer:
+    """Serve transmit and scheduling metrics over HTTP in Prometheus text format.
+
+    The server runs on the simulator's event loop. A scrape only copies
+    counters and sums a few histogram buckets, which takes well under a
+    millisecond, and all socket I/O is non-blocking, so a slow or stuck
+    client never holds up the broadcast coroutine. Event-loop lag is
+    sampled by a task that sleeps METRICS_LAG_INTERVAL and records how late
+    it wakes up.
+    """
+
+    def __init__(self, scheduler, tx_queue, port, host=METRICS_HOST):
+        self.scheduler = scheduler
+        self.tx_queue = tx_queue
+        self.host = host
+        self.port = port
+        self.loop_lag = Histogram(0.0, LAG_RANGE, LAG_BIN)
+        self.scrapes = 0
+        self._server = None
+        self._lag_task = None
+        self._connections = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self._lag_task = asyncio.create_task(self._sample_loop_lag())
+        logger.info(f"Metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+        if self._server is not None:
+            self._server.close()
+        # Clients still connected would otherwise keep their handlers waiting
+        for task in self._connections:
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _sample_loop_lag(self):
+        while True:
+            expected = time.perf_counter() + METRICS_LAG_INTERVAL
+            await asyncio.sleep(METRICS_LAG_INTERVAL)
+            self.loop_lag.add(max(0.0, time.perf_counter() - expected))
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            request = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            if not request:
+                return
+            # Skip the headers
+            while (await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)).strip():
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                self.scrapes += 1
+                status, body = "200 OK", self.render().encode()
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(f"HTTP/1.1 {status}\r\n"
+                         f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         f"Content-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + body)
+            await asyncio.wait_for(writer.drain(), REQUEST_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.CancelledError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"Error serving metrics: {e}")
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    def render(self):
+        """Current metrics in Prometheus text exposition format"""
+        queue, scheduler = self.tx_queue, self.scheduler
+        # Counters are updated by the writer thread; copy them in one step each
+        sent, enobufs, errors = dict(queue.sent_by_id), dict(queue.enobufs_by_id), dict(queue.errors_by_id)
+        lines = [
+            "# HELP vcu_frames_sent_total Frames sent per arbitration ID",
+            "# TYPE vcu_frames_sent_total counter",
+        ]
+        lines += [f'vcu_frames_sent_total{{id="{i:#05x}"}} {n}' for i, n in sorted(sent.items())]
+        lines += [
+            "# HELP vcu_tx_errors_total Failed sends per arbitration ID (enobufs: retried on a full socket buffer)",
+            "# TYPE vcu_tx_errors_total counter",
+        ]
+        lines += [f'vcu_tx_errors_total{{id="{i:#05x}",kind="enobufs"}} {n}' for i, n in sorted(enobufs.items())]
+        lines += [f'vcu_tx_errors_total{{id="{i:#05x}",kind="error"}} {n}' for i, n in sorted(errors.items())]
+        lines += [
+            "# HELP vcu_tx_dropped_total Frames dropped before sending",
+            "# TYPE vcu_tx_dropped_total counter",
+            f'vcu_tx_dropped_total{{reason="coalesced"}} {queue.coalesced}',
+            f'vcu_tx_dropped_total{{reason="shed"}} {queue.shed}',
+            "# HELP vcu_tx_queue_depth Frames waiting in the transmit queue",
+            "# TYPE vcu_tx_queue_depth gauge",
+            f"vcu_tx_queue_depth {queue.depth}",
+            "# HELP vcu_tx_queue_max_depth Deepest the transmit queue has been",
+            "# TYPE vcu_tx_queue_max_depth gauge",
+            f"vcu_tx_queue_max_depth {queue.max_depth_seen}",
+            "# HELP vcu_deadline_misses_total Broadcast deadlines missed per arbitration ID",
+            "# TYPE vcu_deadline_misses_total counter",
+        ]
+        lines += [f'vcu_deadline_misses_total{{id="{i:#05x}"}} {n}'
+                  for i, n in sorted(scheduler.missed_deadlines.items())]
+        lines += [
+            "# HELP vcu_ticks_total Scheduler ticks run",
+            "# TYPE vcu_ticks_total counter",
+            f"vcu_ticks_total {scheduler.ticks_run}",
+            "# HELP vcu_ticks_skipped_total Scheduler ticks skipped after an overrun",
+            "# TYPE vcu_ticks_skipped_total counter",
+            f"vcu_ticks_skipped_total {scheduler.ticks_skipped}",
+            "# HELP vcu_tick_max_lateness_seconds Latest a tick has started after its deadline",
+            "# TYPE vcu_tick_max_lateness_seconds gauge",
+            f"vcu_tick_max_lateness_seconds {scheduler.max_lateness:.6f}",
+            "# HELP vcu_tick_duration_seconds Time to run one scheduler tick",
+            "# TYPE vcu_tick_duration_seconds histogram",
+        ]
+        lines += _format_histogram("vcu_tick_duration_seconds", scheduler.tick_durations, DURATION_BUCKETS)
+        lines += [
+            "# HELP vcu_event_loop_lag_seconds How late the event loop wakes a sleeping task",
+            "# TYPE vcu_event_loop_lag_seconds histogram",
+        ]
+        lines += _format_histogram("vcu_event_loop_lag_seconds", self.loop_lag, DURATION_BUCKETS)
+        return "\n".join(lines) + "\n"
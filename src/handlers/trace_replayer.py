@@ -0,0 +1,180 @@
+"""
+Trace replay: send a recorded session back onto a bus with precise timing
+"""
+import errno
+import logging
+import queue
+import threading
+import time
+from array import array
+import can
+from .bus_writer import percentiles
+from ..utils.trace_files import read_trace
+from ..config.settings import (REPLAY_READ_AHEAD_CHUNKS, REPLAY_CHUNK_SIZE, REPLAY_SPIN_SECONDS,
+                               TX_MAX_RETRIES, TX_BACKOFF_INITIAL, TX_BACKOFF_MAX)
+
+logger = logging.getLogger(__name__)
+
+ALL_ID_BITS = 0x1FFFFFFF
+_END = None
+
+def parse_id_filters(text):
+    """Parse "600,601,510:7F0" (hex ID or ID:mask, candump style) into (id, mask) pairs"""
+    filters = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        can_id, _, mask = item.partition(":")
+        filters.append((int(can_id, 16), int(mask, 16) if mask else ALL_ID_BITS))
+    return filters
+
+
+class TraceReplayer:
+    """Replay a trace file onto a bus at 1x, Nx or as fast as possible.
+
+    A reader thread streams the file (binary traces seek to the window
+    through their index) and keeps up to
+    REPLAY_READ_AHEAD_CHUNKS chunks of filtered frames queued, so traces of
+    any length replay in bounded memory and parsing never stalls a send.
+    Every frame is due at an absolute deadline, replay start + trace offset
+    / speed, so timing error does not accumulate. The sender sleeps until
+    just before the deadline and spins for the last REPLAY_SPIN_SECONDS.
+    The error of each send against its deadline is recorded for the report.
+    """
+
+    def __init__(self, bus, path, speed=1.0, id_filters=None, window=(None, None),
+                 latency_samples=100000):
+        if speed is not None and speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        self.bus = bus
+        self.path = path
+        self.speed = speed
+        self.id_filters = id_filters or []
+        self.window_start, self.window_end = window
+        self.chunks = queue.Queue(maxsize=REPLAY_READ_AHEAD_CHUNKS)
+        self.stopping = threading.Event()
+        self.reader = threading.Thread(target=self._read, name="trace-reader", daemon=True)
+
+        # Statistics
+        self.read = 0
+        self.filtered = 0
+        self.sent = 0
+        self.errors = 0
+        self.enobufs = 0
+        self.elapsed = 0.0
+        self.timing_errors = array("d", bytes(8 * latency_samples))
+        self.timing_count = 0
+
+    def _accepts(self, arbitration_id):
+        if not self.id_filters:
+            return True
+        return any((arbitration_id & mask) == (can_id & mask) for can_id, mask in self.id_filters)
+
+    def _read(self):
+        """Reader thread: stream, window and filter the trace into chunks"""
+        chunk = []
+        try:
+            for msg in read_trace(self.path, self.window_start, self.window_end):
+                if self.stopping.is_set():
+                    break
+                self.read += 1
+                if msg.is_error_frame or not self._accepts(msg.arbitration_id):
+                    self.filtered += 1
+                    continue
+                # The recorded channel would redirect socketcan sends
+                msg.channel = None
+                chunk.append(msg)
+                if len(chunk) >= REPLAY_CHUNK_SIZE:
+                    self._put(chunk)
+                    chunk = []
+        except Exception as e:
+            logger.error(f"Error reading trace {self.path}: {e}")
+        finally:
+            if chunk:
+                self._put(chunk)
+            self._put(_END)
+
+    def _put(self, item):
+        """Queue a chunk, giving up if the replay is stopped while the queue is full"""
+        while not self.stopping.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _wait_until(self, deadline):
+        """Sleep until shortly before `deadline`, then spin to it"""
+        remaining = deadline - time.perf_counter()
+        if remaining > REPLAY_SPIN_SECONDS:
+            time.sleep(remaining - REPLAY_SPIN_SECONDS)
+        while time.perf_counter() < deadline:
+            pass
+
+    def _send(self, msg):
+        """Send one frame, backing off briefly while the socket buffer is full"""
+        delay = TX_BACKOFF_INITIAL
+        for attempt in range(TX_MAX_RETRIES + 1):
+            try:
+                self.bus.send(msg)
+                self.sent += 1
+                return True
+            except can.CanError as e:
+                if getattr(e, "error_code", None) != errno.ENOBUFS:
+                    self.errors += 1
+                    logger.error(f"Error replaying {hex(msg.arbitration_id)}: {e}")
+                    return False
+                self.enobufs += 1
+                time.sleep(delay)
+                delay = min(delay * 2, TX_BACKOFF_MAX)
+        self.errors += 1
+        return False
+
+    def run(self):
+        """Replay the whole trace (or window); returns the number of frames sent"""
+        self.reader.start()
+        origin = None
+        base = None
+        started = time.perf_counter()
+        try:
+            while True:
+                chunk = self.chunks.get()
+                if chunk is _END:
+                    break
+                for msg in chunk:
+                    if self.speed is None:
+                        self._send(msg)
+                        continue
+                    if origin is None:
+                        origin, base = time.perf_counter(), msg.timestamp
+                    deadline = origin + (msg.timestamp - base) / self.speed
+                    self._wait_until(deadline)
+                    self._send(msg)
+                    self.timing_errors[self.timing_count % len(self.timing_errors)] = time.perf_counter() - deadline
+                    self.timing_count += 1
+        finally:
+            self.elapsed = time.perf_counter() - started
+            self.stop()
+        return self.sent
+
+    def stop(self):
+        """Stop reading ahead; the reader thread exits at its next frame"""
+        self.stopping.set()
+
+    def report(self):
+        """Frame counts and send timing error percentiles in microseconds"""
+        summary = {
+            "read": self.read,
+            "filtered": self.filtered,
+            "sent": self.sent,
+            "errors": self.errors,
+            "enobufs": self.enobufs,
+            "elapsed_s": round(self.elapsed, 3),
+            "frames_per_second": round(self.sent / self.elapsed, 1) if self.elapsed else 0.0,
+        }
+        samples = self.timing_errors[:min(self.timing_count, len(self.timing_errors))]
+        if samples:
+            summary.update({f"error_p{p:g}_us": round(v * 1e6, 1) for p, v in percentiles(samples).items()})
+            summary["error_max_us"] = round(max(samples) * 1e6, 1)
+        return summary
@@ -0,0 +1,233 @@
+"""
+Priority transmit queue between the message senders and the CAN bus
+"""
+import collections
+import errno
+import heapq
+import itertools
+import logging
+import time
+import can
+from ..utils.histogram import LogLinearHistogram
+from ..utils.logs import RepeatedErrors
+from ..config.settings import *
+
+logger = logging.getLogger(__name__)
+
+class TransmitQueue:
+    """Coalescing priority queue that absorbs ENOBUFS storms.
+
+    Only the newest frame per arbitration ID is kept; frames leave in
+    TX_PRIORITIES order. When the kernel reports ENOBUFS the queue backs
+    off exponentially (bounded by TX_BACKOFF_MAX) and, once the retry budget
+    is spent, sheds the lowest-priority pending frame so state and fault
+    messages keep going out. The queue is not thread-safe; BusWriter owns it.
+
+    Every successful `bus.send` call is timed into a log-linear histogram
+    per arbitration ID (nanoseconds), which costs well under a microsecond
+    per frame. Send errors are logged once per arbitration ID and errno,
+    then summarised every LOG_SUMMARY_INTERVAL while they keep repeating,
+    so a saturated bus does not also flood the log.
+    """
+
+    def __init__(self, bus, priorities=TX_PRIORITIES,
+                 max_depth=TX_QUEUE_MAX_DEPTH, max_retries=TX_MAX_RETRIES,
+                 backoff_initial=TX_BACKOFF_INITIAL, backoff_max=TX_BACKOFF_MAX):
+        self.bus = bus
+        self.on_sent = None  # callback(arbitration_id, enqueued_at, event) after each send
+        self.priorities = priorities
+        self.max_depth = max_depth
+        self.max_retries = max_retries
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self._heap = []      # (priority, seq, arbitration_id); stale entries skipped lazily
+        self._pending = {}   # arbitration_id -> (seq, message, enqueued_at, event)
+        self._frames = {}    # arbitration_id -> frame owned by the queue (snapshot sends)
+        self._seq = itertools.count()
+        self._failures = 0
+
+        # Counters
+        self.sent = 0
+        self.coalesced = 0
+        self.shed = 0
+        self.errors = 0
+        self.enobufs = 0
+        self.max_depth_seen = 0
+        # Per arbitration ID (wire ID) counters, e.g. for the metrics endpoint
+        self.sent_by_id = collections.Counter()
+        self.enobufs_by_id = collections.Counter()
+        self.errors_by_id = collections.Counter()
+        self.send_latency = {}  # arbitration_id -> LogLinearHistogram of bus.send in ns
+        self.error_log = RepeatedErrors(logger)
+
+    @property
+    def depth(self):
+        """Number of frames waiting to be sent"""
+        return len(self._pending)
+
+    def put(self, message, enqueued_at=None, data=None, event=False):
+        """Queue a frame, replacing any unsent frame with the same ID.
+
+        `event` marks an event-driven frame; a frame that replaces (or is
+        replaced by) an event-driven one stays marked, since what goes out
+        is off the cyclic schedule either way.
+
+        With `data` (a payload snapshot taken when the frame was submitted
+        from another thread), the frame sent is the queue's own copy of
+        `message` carrying that payload, so later updates of `message` do
+        not change it.
+        """
+        arbitration_id = message.arbitration_id
+        if data is not None:
+            message = self._snapshot(message, data)
+        entry = self._pending.get(arbitration_id)
+        if entry is not None:
+            self._pending[arbitration_id] = (entry[0], message, enqueued_at, event or entry[3])
+            self.coalesced += 1
+            return True
+
+        priority = self._priority(arbitration_id)
+        if len(self._pending) >= self.max_depth:
+            victim = self._lowest_priority()
+            if self._priority(victim) <= priority:
+                self.shed += 1
+                return False
+            self._discard(victim)
+            self.shed += 1
+
+        seq = next(self._seq)
+        self._pending[arbitration_id] = (seq, message, enqueued_at, event)
+        heapq.heappush(self._heap, (priority, seq, arbitration_id))
+        self.max_depth_seen = max(self.max_depth_seen, len(self._pending))
+        return True
+
+    def drain(self):
+        """Send pending frames in priority order.
+
+        Returns the number of seconds to back off before retrying, or None
+        once the queue is empty.
+        """
+        self.error_log.poll()
+        while self._heap:
+            _, seq, arbitration_id = self._heap[0]
+            entry = self._pending.get(arbitration_id)
+            if entry is None or entry[0] != seq:
+                heapq.heappop(self._heap)
+                continue
+
+            started = time.perf_counter_ns()
+            try:
+                self.bus.send(entry[1])
+            except Exception as e:
+                if getattr(e, "error_code", None) == errno.ENOBUFS:
+                    self.enobufs += 1
+                    self.enobufs_by_id[arbitration_id] += 1
+                    self._failures += 1
+                    if self._failures <= self.max_retries:
+                        return min(self.backoff_max,
+                                   self.backoff_initial * 2 ** (self._failures - 1))
+                    # Retry budget spent: shed the least important frame and go on
+                    victim = self._lowest_priority()
+                    self.error_log.log(logging.WARNING, (victim, errno.ENOBUFS),
+                                       f"Transmit queue congested, shedding {hex(victim)} "
+                                       f"({self.depth} pending)")
+                    self._discard(victim)
+                    self.shed += 1
+                    self._failures = 0
+                    continue
+                code = getattr(e, "error_code", None)
+                self.error_log.log(logging.ERROR, (arbitration_id, code if code is not None else type(e).__name__),
+                                   f"Error sending message {hex(arbitration_id)}: {e}")
+                self.errors += 1
+                self.errors_by_id[arbitration_id] += 1
+            else:
+                elapsed = time.perf_counter_ns() - started
+                histogram = self.send_latency.get(arbitration_id)
+                if histogram is None:
+                    histogram = self.send_latency[arbitration_id] = LogLinearHistogram(
+                        SEND_LATENCY_MAX_NS, SEND_LATENCY_SUB_BITS)
+                histogram.add(elapsed)
+                self.sent += 1
+                self.sent_by_id[arbitration_id] += 1
+                if self.on_sent is not None:
+                    self.on_sent(arbitration_id, entry[2], entry[3])
+
+            self._failures = 0
+            heapq.heappop(self._heap)
+            del self._pending[arbitration_id]
+        return None
+
+    def flush(self, timeout=1.0):
+        """Drain synchronously, blocking through backoffs for up to `timeout` seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            delay = self.drain()
+            if delay is None:
+                return True
+            if time.monotonic() + delay > deadline:
+                return False
+            time.sleep(delay)
+
+    def stats(self):
+        """Queue depth and transmit/drop counters"""
+        return {
+            "depth": self.depth,
+            "max_depth_seen": self.max_depth_seen,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "shed": self.shed,
+            "errors": self.errors,
+            "enobufs_retries": self.enobufs,
+            "dropped": self.coalesced + self.shed + self.errors,
+        }
+
+    def send_latency_report(self):
+        """Per-ID bus.send latency percentiles in microseconds"""
+        report = {}
+        # The writer thread may add IDs while this runs
+        for arbitration_id, histogram in sorted(list(self.send_latency.items())):
+            summary = histogram.summary()
+            report[hex(arbitration_id)] = {
+                key: value if key == "count" else round(value / 1000.0, 2)
+                for key, value in summary.items()
+            }
+        return report
+
+    def format_send_latency(self):
+        """Table of `send_latency_report()`"""
+        header = f"{'ID':>7} {'sends':>9} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'max':>9}"
+        lines = ["bus.send latency (us)", header]
+        for arbitration_id, r in self.send_latency_report().items():
+            lines.append(f"{arbitration_id:>7} {r['count']:>9} {r['mean']:>8.2f} {r['p50']:>8.2f} "
+                         f"{r['p90']:>8.2f} {r['p99']:>8.2f} {r['p99.9']:>8.2f} {r['max']:>9.2f}")
+        return "\n".join(lines)
+
+    def _snapshot(self, message, data):
+        """The queue's frame for `message`'s ID, holding `data`"""
+        frame = self._frames.get(message.arbitration_id)
+        if frame is None or frame.dlc != len(data) or frame.is_fd != message.is_fd:
+            frame = can.Message(
+                arbitration_id=message.arbitration_id,
+                data=bytearray(data),
+                is_extended_id=message.is_extended_id,
+                is_fd=message.is_fd,
+                bitrate_switch=message.bitrate_switch,
+                dlc=len(data)
+            )
+            self._frames[message.arbitration_id] = frame
+        else:
+            frame.data[:] = data
+        return frame
+
+    def _lowest_priority(self):
+        """Pending arbitration ID that should be shed first"""
+        return max(self._pending, key=lambda i: (self._priority(i), self._pending[i][0]))
+
+    def _priority(self, arbitration_id):
+        """Priority of a wire ID, looked up by its catalog ID (fleet offsets masked off)"""
+        return self.priorities.get(arbitration_id & STANDARD_ID_MASK, DEFAULT_TX_PRIORITY)
+
+    def _discard(self, arbitration_id):
+        """Drop a pending frame; its heap entry is skipped when reached"""
+        del self._pending[arbitration_id]
@@ -0,0 +1,221 @@
+"""
+Fixed-record binary CAN traces with a sidecar time/ID index, read through mmap
+"""
+import logging
+import os
+import struct
+import can
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BINARY_TRACE_SUFFIX = ".vtrace"
+MAGIC = b"VCUTRACE"
+VERSION = 1
+# magic, version, payload bytes per record
+HEADER = struct.Struct("<8sHH4x")
+
+# Record flags
+FLAG_EXTENDED = 0x01
+FLAG_FD = 0x02
+FLAG_BRS = 0x04
+FLAG_RX = 0x08
+
+CLASSIC_PAYLOAD = 8
+FD_PAYLOAD = 64
+
+def record_dtype(payload_size):
+    """NumPy structured dtype of one record: 16 bytes of header plus the payload"""
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("arbitration_id", "<u4"),
+        ("dlc", "u1"),
+        ("flags", "u1"),
+        ("reserved", "u1", 2),
+        ("data", "u1", payload_size),
+    ])
+
+def index_path(path):
+    """Sidecar index file of a binary trace"""
+    return path + ".idx.npz"
+
+
+class BinaryTraceWriter(can.Listener):
+    """Append frames to a binary trace as fixed-size records.
+
+    Records are packed into a preallocated buffer and written in large
+    blocks, so memory is bounded however long the run is. The sidecar index
+    is built from the finished file when the writer is stopped. Use an FD
+    payload width (64 bytes) for traces that contain CAN FD frames.
+    """
+
+    def __init__(self, path, fd=False, buffer_records=4096, block_seconds=1.0):
+        self.path = path
+        self.payload_size = FD_PAYLOAD if fd else CLASSIC_PAYLOAD
+        self.block_seconds = block_seconds
+        self.record = struct.Struct(f"<dIBB2x{self.payload_size}s")
+        self.buffer = bytearray(self.record.size * buffer_records)
+        self.buffer_records = buffer_records
+        self.pending = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.payload_size))
+
+    def on_message_received(self, msg):
+        if msg.dlc > self.payload_size:
+            raise ValueError(f"{msg.dlc}-byte frame does not fit a {self.payload_size}-byte binary trace")
+        flags = ((FLAG_EXTENDED if msg.is_extended_id else 0) | (FLAG_FD if msg.is_fd else 0)
+                 | (FLAG_BRS if msg.bitrate_switch else 0) | (FLAG_RX if msg.is_rx else 0))
+        self.record.pack_into(self.buffer, self.pending * self.record.size,
+                              msg.timestamp, msg.arbitration_id, msg.dlc, flags, bytes(msg.data))
+        self.pending += 1
+        if self.pending == self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to the file"""
+        if self.pending:
+            self.file.write(memoryview(self.buffer)[:self.pending * self.record.size])
+            self.pending = 0
+
+    def stop(self):
+        """Write out remaining records, close the file and build its index"""
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+        BinaryTrace(self.path, block_seconds=self.block_seconds, rebuild_index=True)
+
+
+class BinaryTrace:
+    """Read-only view of a binary trace.
+
+    The records are a NumPy structured array over an `mmap` of the file, so
+    opening a trace reads only its header and index. Time slices are views
+    of the mapping (no copy); queries use the index to touch only the time
+    blocks that contain the requested IDs. Times are seconds from the first
+    frame of the trace.
+    """
+
+    def __init__(self, path, block_seconds=1.0, rebuild_index=False):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, payload_size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} binary trace")
+        self.payload_size = payload_size
+        self.dtype = record_dtype(payload_size)
+        count = (os.path.getsize(path) - HEADER.size) // self.dtype.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=HEADER.size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+        if rebuild_index or not self._load_index():
+            self._build_index(block_seconds)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _load_index(self):
+        """Load the sidecar index if it matches the trace; False if it must be rebuilt"""
+        try:
+            with np.load(index_path(self.path)) as index:
+                if int(index["record_count"]) != len(self.records):
+                    return False
+                self.start_time = float(index["start_time"])
+                self.block_seconds = float(index["block_seconds"])
+                self.block_starts = index["block_starts"]
+                self.ids = index["ids"]
+                self.id_counts = index["id_counts"]
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Rebuilding unreadable index of {self.path}: {e}")
+            return False
+
+    def _build_index(self, block_seconds):
+        """Index records by time block and, per block, by arbitration ID"""
+        timestamps = self.records["timestamp"]
+        if len(timestamps) and np.any(np.diff(timestamps) < 0):
+            raise ValueError(f"{self.path} has timestamps out of order and cannot be indexed")
+        self.block_seconds = block_seconds
+        self.start_time = float(timestamps[0]) if len(timestamps) else 0.0
+        blocks = ((timestamps - self.start_time) // block_seconds).astype(np.int64)
+        block_count = int(blocks[-1]) + 1 if len(blocks) else 0
+        # Record index where each block starts; one extra entry marks the end
+        self.block_starts = np.searchsorted(blocks, np.arange(block_count + 1)).astype(np.int64)
+        self.ids, id_columns = np.unique(self.records["arbitration_id"], return_inverse=True)
+        counts = np.bincount(blocks * len(self.ids) + id_columns, minlength=block_count * len(self.ids))
+        self.id_counts = counts.reshape(block_count, len(self.ids)).astype(np.uint32)
+
+        try:
+            np.savez(index_path(self.path), record_count=len(self.records), start_time=self.start_time,
+                     block_seconds=self.block_seconds, block_starts=self.block_starts,
+                     ids=self.ids, id_counts=self.id_counts)
+        except OSError as e:
+            logger.warning(f"Could not save index of {self.path}: {e}")
+        logger.info(f"Indexed {len(self.records)} frames of {self.path} in {block_count} blocks")
+
+    @property
+    def duration(self):
+        return float(self.records["timestamp"][-1]) - self.start_time if len(self.records) else 0.0
+
+    def _block_range(self, start, end):
+        block_count = len(self.block_starts) - 1
+        first = 0 if start is None else max(0, int(start // self.block_seconds))
+        last = block_count if end is None else min(block_count, int(end // self.block_seconds) + 1)
+        return first, max(first, last)
+
+    def _trim(self, records, start, end):
+        """Narrow a block-aligned slice to [start, end] by binary search"""
+        timestamps = records["timestamp"]
+        lo = 0 if start is None else np.searchsorted(timestamps, self.start_time + start, "left")
+        hi = len(records) if end is None else np.searchsorted(timestamps, self.start_time + end, "right")
+        return records[lo:hi]
+
+    def time_slice(self, start=None, end=None):
+        """Records between `start` and `end` seconds as a zero-copy view"""
+        first, last = self._block_range(start, end)
+        return self._trim(self.records[self.block_starts[first]:self.block_starts[last]], start, end)
+
+    def query(self, ids=None, start=None, end=None):
+        """Records with the given arbitration IDs between `start` and `end` seconds.
+
+        Only index blocks that contain one of the IDs are read; the result
+        holds the matching records only.
+        """
+        if ids is None:
+            return self.time_slice(start, end)
+        first, last = self._block_range(start, end)
+        columns = np.nonzero(np.isin(self.ids, list(ids)))[0]
+        if not len(columns) or first == last:
+            return np.zeros(0, dtype=self.dtype)
+        present = self.id_counts[first:last][:, columns].any(axis=1)
+        blocks = first + np.nonzero(present)[0]
+
+        wanted = np.asarray(list(ids), dtype=np.uint32)
+        parts = []
+        # Read runs of consecutive blocks as one slice each
+        runs = np.split(blocks, np.nonzero(np.diff(blocks) != 1)[0] + 1) if len(blocks) else []
+        for run in runs:
+            records = self._trim(self.records[self.block_starts[run[0]]:self.block_starts[run[-1] + 1]], start, end)
+            parts.append(records[np.isin(records["arbitration_id"], wanted)])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=self.dtype)
+
+    def messages(self, records=None):
+        """Iterate records (the whole trace by default) as can.Message objects"""
+        records = self.records if records is None else records
+        for record in records:
+            flags = int(record["flags"])
+            dlc = int(record["dlc"])
+            yield can.Message(
+                timestamp=float(record["timestamp"]),
+                arbitration_id=int(record["arbitration_id"]),
+                is_extended_id=bool(flags & FLAG_EXTENDED),
+                is_fd=bool(flags & FLAG_FD),
+                bitrate_switch=bool(flags & FLAG_BRS),
+                is_rx=bool(flags & FLAG_RX),
+                dlc=dlc,
+                data=record["data"][:dlc].tobytes(),
+            )
@@ -0,0 +1,74 @@
+"""
+Pluggable CAN bus backends for the simulator
+"""
+import logging
+import time
+import can
+from .trace_files import open_trace_writer
+
+logger = logging.getLogger(__name__)
+
+class NullBus(can.BusABC):
+    """In-process sink that discards frames; used for pure throughput runs"""
+
+    def __init__(self, channel="null", **kwargs):
+        super().__init__(channel=channel, **kwargs)
+        self.channel_info = f"null sink {channel}"
+        self.frames_sent = 0
+
+    def send(self, msg, timeout=None):
+        self.frames_sent += 1
+
+    def _recv_internal(self, timeout):
+        return None, False
+
+
+class FileSinkBus(can.BusABC):
+    """Write every sent frame to a log file instead of a bus.
+
+    The format follows the file suffix as in `can.Logger` (.log candump,
+    .asc, .blf, .csv, ...), plus the indexed binary .vtrace format. The
+    .log, .asc, .blf and .vtrace writers go through a large write buffer.
+    Each frame is stamped with `clock()` when it is sent.
+    """
+
+    def __init__(self, channel, clock=time.time, buffer_size=1 << 20, fd=False, **kwargs):
+        if not channel:
+            raise ValueError("The file backend needs an output path as its channel")
+        super().__init__(channel=channel, **kwargs)
+        self.channel_info = f"file sink {channel}"
+        self.clock = clock
+        self.writer = open_trace_writer(channel, buffer_size, fd=fd)
+        self.frames_sent = 0
+
+    def send(self, msg, timeout=None):
+        msg.timestamp = self.clock()
+        msg.is_rx = False
+        self.writer.on_message_received(msg)
+        self.frames_sent += 1
+
+    def _recv_internal(self, timeout):
+        return None, False
+
+    def shutdown(self):
+        self.writer.stop()
+        super().shutdown()
+
+
+# Backend name -> (bus factory, default channel)
+BACKENDS = {
+    "socketcan": (lambda channel, **kw: can.Bus(channel=channel, interface="socketcan", **kw), "can0"),
+    "vcan": (lambda channel, **kw: can.Bus(channel=channel, interface="socketcan", **kw), "vcan0"),
+    "virtual": (lambda channel, **kw: can.Bus(channel=channel, interface="virtual", **kw), "vcu"),
+    "null": (NullBus, "null"),
+    "file": (FileSinkBus, None),
+}
+
+def create_bus(backend="socketcan", channel=None, **kwargs):
+    """Open a bus for `backend`, falling back to its default channel"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown bus backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    factory, default_channel = BACKENDS[backend]
+    channel = channel or default_channel
+    logger.info(f"Opening {backend} bus on {channel}")
+    return factory(channel, **kwargs)
@@ -0,0 +1,47 @@
+"""
+Bus-load estimates for classic CAN and CAN FD frame schedules
+"""
+import math
+
+def classic_frame_bits(length, extended=False):
+    """Worst-case bits on the wire for a classic CAN frame, stuffing included"""
+    header = 54 if extended else 34   # SOF, ID, control and CRC bits exposed to stuffing
+    stuffable = header + 8 * length
+    fixed = 13                        # CRC delimiter, ACK slot/delimiter, EOF, IFS
+    return stuffable + (stuffable - 1) // 4 + fixed
+
+def fd_frame_bits(length, extended=False):
+    """Worst-case (nominal-phase, data-phase) bits for a CAN FD frame with BRS"""
+    # SOF, ID, RRS/IDE, FDF, res, BRS at the nominal rate
+    arbitration = 17 + (18 + 1 if extended else 0)
+    # ESI, DLC and data at the data rate, dynamically stuffed
+    data = 1 + 4 + 8 * length
+    stuffed = arbitration + data
+    stuff_bits = (stuffed - 1) // 4
+    # Stuff count and CRC carry fixed stuff bits every four bits
+    crc = 17 if length <= 16 else 21
+    crc_field = 4 + crc + math.ceil((4 + crc) / 4)
+    # CRC delimiter, ACK slot/delimiter, EOF and IFS back at the nominal rate
+    tail = 1 + 2 + 7 + 3
+    arbitration_share = stuff_bits * arbitration / stuffed
+    return arbitration + arbitration_share + tail, data + (stuff_bits - arbitration_share) + crc_field
+
+def frame_time(length, is_fd, nominal_bitrate, data_bitrate, extended=False):
+    """Seconds one frame occupies the bus"""
+    if not is_fd:
+        return classic_frame_bits(length, extended) / nominal_bitrate
+    nominal_bits, data_bits = fd_frame_bits(length, extended)
+    return nominal_bits / nominal_bitrate + data_bits / data_bitrate
+
+def bus_load(frames, nominal_bitrate, data_bitrate):
+    """Frames per second and utilisation of a schedule.
+
+    `frames` is an iterable of (payload length, period in ms, is_fd) tuples.
+    """
+    frames_per_second = 0.0
+    busy = 0.0
+    for length, period_ms, is_fd in frames:
+        rate = 1000.0 / period_ms
+        frames_per_second += rate
+        busy += rate * frame_time(length, is_fd, nominal_bitrate, data_bitrate)
+    return {"frames_per_second": frames_per_second, "utilization": busy}
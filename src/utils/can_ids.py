@@ -1,6 +1,7 @@
 """
 CAN ID and state definitions for VCU
 """
+from .signals import Signal, MessageDefinition, BIG_ENDIAN, LITTLE_ENDIAN
 
 # Vehicle Data IDs 
 CHARGE_PERCENTAGE_ID = 0x101
@@ -21,6 +22,14 @@ BRAKE_TEMP_ID = 0x405
 VEHICLE_STATE_ID = 0x600
 VEHICLE_FAULT_ID = 0x601
 
+# Fleet mode: vehicle N sends on extended ID (N * VEHICLE_ID_STRIDE) + catalog ID
+VEHICLE_ID_STRIDE = 0x800
+STANDARD_ID_MASK = 0x7FF
+
+# CAN FD metric IDs (FD frame profile only)
+FD_FAST_METRICS_ID = 0x510
+FD_SLOW_METRICS_ID = 0x511
+
 class VehicleStates:
     # Primary States (Byte 0)
     PARK = 0x01
@@ -81,4 +90,93 @@ class VehicleStates:
             cls.NEUTRAL: "NEUTRAL",
             cls.CHARGE: "CHARGE"
         }
-        return states.get(state_code, "UNKNOWN")
\ No newline at end of file
+        return states.get(state_code, "UNKNOWN")
+
+def _byte_signal(name, byte, unit="", signed=False, factor=1, offset=0, minimum=None, maximum=None):
+    """Single-byte signal at payload byte `byte`"""
+    return Signal(name, byte * 8, 8, LITTLE_ENDIAN, factor=factor, offset=offset,
+                  signed=signed, minimum=minimum, maximum=maximum, unit=unit)
+
+def _wheel_signals(prefix, unit="", minimum=None, maximum=None):
+    """One byte per wheel: FL, FR, RL, RR"""
+    return [_byte_signal(f"{prefix}{wheel}", i, unit, minimum=minimum, maximum=maximum)
+            for i, wheel in enumerate(("FL", "FR", "RL", "RR"))]
+
+# Message catalog: payload layout of every VCU message (see README message details)
+MESSAGE_DEFINITIONS = [
+    MessageDefinition("VehicleState", VEHICLE_STATE_ID, 8, [
+        Signal("PrimaryState", 7, 8, BIG_ENDIAN),
+        Signal("SubState", 15, 8, BIG_ENDIAN),
+        Signal("StatusFlags", 23, 8, BIG_ENDIAN),
+        Signal("FaultPresent", 31, 8, BIG_ENDIAN),
+        Signal("MessageCounter", 39, 16, BIG_ENDIAN),
+    ]),
+    MessageDefinition("FaultStatus", VEHICLE_FAULT_ID, 8, [
+        Signal("FaultSource", 7, 8, BIG_ENDIAN),
+        Signal("FaultType", 15, 8, BIG_ENDIAN),
+        Signal("Severity", 23, 8, BIG_ENDIAN),
+        Signal("Timestamp", 31, 32, BIG_ENDIAN, unit="ms"),
+        Signal("FaultCounter", 63, 8, BIG_ENDIAN),
+    ]),
+    MessageDefinition("ChargePercentage", CHARGE_PERCENTAGE_ID, 1, [
+        _byte_signal("ChargePercent", 0, "%", minimum=0, maximum=100)]),
+    MessageDefinition("ChargingRate", CHARGING_RATE_ID, 1, [
+        _byte_signal("ChargingRate", 0, "kW")]),
+    MessageDefinition("EstFullChargeTime", ESTIMATED_FULL_CHARGE_TIME_ID, 1, [
+        _byte_signal("EstFullChargeTime", 0, "min")]),
+    MessageDefinition("BatteryTemperature", BATTERY_TEMP_ID, 1, [
+        _byte_signal("BatteryTemp", 0, "degC")]),
+    MessageDefinition("MotorTemperature", MOTOR_TEMP_ID, 1, [
+        _byte_signal("MotorTemp", 0, "degC")]),
+    MessageDefinition("InverterTemperature", INVERTER_TEMP_ID, 1, [
+        _byte_signal("InverterTemp", 0, "degC")]),
+    MessageDefinition("TireTemperature", TIRE_TEMP_ID, 4, _wheel_signals("TireTemp", "degC")),
+    MessageDefinition("TirePressure", TIRE_PRESSURE_ID, 4, _wheel_signals("TirePressure", "PSI")),
+    MessageDefinition("PowerOutput", POWER_OUTPUT_ID, 1, [
+        _byte_signal("PowerOutput", 0, "kW", minimum=0, maximum=100)]),
+    MessageDefinition("TorqueDistribution", TORQUE_DISTRIBUTION_ID, 4,
+                      _wheel_signals("Torque", "%", minimum=0, maximum=100)),
+    MessageDefinition("SuspensionMetrics", SUSPENSION_METRICS_ID, 4, _wheel_signals("Suspension", "mm")),
+    MessageDefinition("GForces", G_FORCES_ID, 3, [
+        _byte_signal("GForceX", 0, "g", signed=True, factor=0.1),
+        _byte_signal("GForceY", 1, "g", signed=True, factor=0.1),
+        _byte_signal("GForceZ", 2, "g", signed=True, factor=0.1),
+    ]),
+    MessageDefinition("BrakeTemperature", BRAKE_TEMP_ID, 1, [
+        _byte_signal("BrakeTemp", 0, "degC")]),
+]
+
+# CAN FD frame profile: metric messages packed back to back into FD frames.
+# The fast frame carries everything broadcast every 100-200ms, the slow
+# frame the 500ms tire data. State and fault stay classic 8-byte frames.
+FD_METRIC_GROUPS = {
+    FD_FAST_METRICS_ID: [
+        POWER_OUTPUT_ID, CHARGE_PERCENTAGE_ID, CHARGING_RATE_ID, ESTIMATED_FULL_CHARGE_TIME_ID,
+        BATTERY_TEMP_ID, MOTOR_TEMP_ID, INVERTER_TEMP_ID, TORQUE_DISTRIBUTION_ID,
+        SUSPENSION_METRICS_ID, G_FORCES_ID, BRAKE_TEMP_ID,
+    ],
+    FD_SLOW_METRICS_ID: [TIRE_TEMP_ID, TIRE_PRESSURE_ID],
+}
+
+# Payload lengths a CAN FD frame can carry
+FD_FRAME_LENGTHS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64)
+
+def _fd_group(name, arbitration_id, member_ids):
+    """Concatenate the signals of classic metric messages into one FD message"""
+    members = {d.arbitration_id: d for d in MESSAGE_DEFINITIONS}
+    signals, position = [], 0
+    for member_id in member_ids:
+        member = members[member_id]
+        for s in member.signals:
+            signals.append(Signal(s.name, s.start_bit + position * 8, s.length, s.byte_order,
+                                  factor=s.factor, offset=s.offset, signed=s.signed,
+                                  minimum=s.minimum, maximum=s.maximum, unit=s.unit))
+        position += member.length
+    length = next(n for n in FD_FRAME_LENGTHS if n >= position)
+    return MessageDefinition(name, arbitration_id, length, signals,
+                             comment=f"CAN FD pack of {', '.join(hex(i) for i in member_ids)}")
+
+FD_MESSAGE_DEFINITIONS = [
+    _fd_group("FdMetricsFast", FD_FAST_METRICS_ID, FD_METRIC_GROUPS[FD_FAST_METRICS_ID]),
+    _fd_group("FdMetricsSlow", FD_SLOW_METRICS_ID, FD_METRIC_GROUPS[FD_SLOW_METRICS_ID]),
+]
@@ -0,0 +1,81 @@
+"""
+Injectable clocks: real time, or a virtual clock running faster than real time
+"""
+import asyncio
+import time
+
+class RealClock:
+    """Monotonic wall-clock time; sleeping really waits"""
+
+    paced = True
+
+    def __init__(self):
+        # Offset that turns monotonic readings into epoch seconds
+        self._epoch_offset = time.time() - time.monotonic()
+
+    def now(self):
+        return time.monotonic()
+
+    def epoch(self):
+        """Current time as epoch seconds, e.g. for frame timestamps"""
+        return time.monotonic() + self._epoch_offset
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """Simulated time that runs `speed` times faster than real time.
+
+    With `speed=None` the clock runs as fast as the CPU allows: sleeping
+    advances simulated time straight to the wake-up time and only yields to
+    the event loop. `now()` counts simulated seconds from 0, so elapsed
+    times stay exact (an epoch-sized float would lose sub-millisecond
+    precision); `epoch()` adds `start` (now by default), so trace timestamps
+    look like a real capture.
+    """
+
+    def __init__(self, speed=None, start=None):
+        if speed is not None and speed <= 0:
+            raise ValueError("Clock speed must be positive")
+        self.speed = speed
+        self.paced = speed is not None
+        self.start = time.time() if start is None else start
+        self._virtual = 0.0
+        self._real_start = time.monotonic()
+
+    def now(self):
+        if self.speed is None:
+            return self._virtual
+        return (time.monotonic() - self._real_start) * self.speed
+
+    def epoch(self):
+        return self.start + self.now()
+
+    def advance(self, seconds):
+        """Move an as-fast-as-possible clock forward"""
+        if self.speed is not None:
+            raise RuntimeError("Only an unpaced virtual clock can be advanced")
+        self._virtual += max(0.0, seconds)
+
+    async def sleep(self, seconds):
+        if self.speed is None:
+            self.advance(seconds)
+            await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(max(0.0, seconds) / self.speed)
+
+
+REAL_CLOCK = RealClock()
+
+def parse_speed(text):
+    """Clock for a --speed option: "1" real time, "N" (or "Nx") N times faster, "max" unpaced"""
+    if text in (None, "", "realtime"):
+        return REAL_CLOCK
+    if text == "max":
+        return VirtualClock()
+    speed = float(text[:-1] if text.lower().endswith("x") else text)
+    # Any spelling of 1 ("1.0", "1x") is real time, with the real-time setup
+    if speed == 1:
+        return REAL_CLOCK
+    return VirtualClock(speed)
@@ -0,0 +1,161 @@
+"""
+DBC import/export for the VCU message catalog
+"""
+import hashlib
+import logging
+import os
+import pickle
+import re
+from .signals import Signal, MessageDefinition, BIG_ENDIAN, LITTLE_ENDIAN
+
+logger = logging.getLogger(__name__)
+
+NODE_NAME = "VCU"
+NO_RECEIVER = "Vector__XXX"
+EXTENDED_ID_FLAG = 0x80000000
+CACHE_FORMAT = 1
+
+_MESSAGE_RE = re.compile(r"^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)\s+(\w+)", re.MULTILINE)
+_SIGNAL_RE = re.compile(
+    r'^[ \t]+SG_\s+(\w+)\s*(?:\w+\s*)?:\s*(\d+)\|(\d+)@([01])([+-])\s*'
+    r'\(([^,]+),([^)]+)\)\s*\[([^|]*)\|([^\]]*)\]\s*"([^"]*)"',
+    re.MULTILINE
+)
+_COMMENT_RE = re.compile(r'^CM_\s+BO_\s+(\d+)\s+"((?:[^"\\]|\\.)*)"\s*;', re.MULTILINE | re.DOTALL)
+_CYCLE_TIME_RE = re.compile(r'^BA_\s+"GenMsgCycleTime"\s+BO_\s+(\d+)\s+(\d+)\s*;', re.MULTILINE)
+
+def _number(text):
+    """Parse a DBC number, keeping integers as int"""
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+def _format_number(value):
+    """Format a number the way DBC files usually carry it"""
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(text):
+    """Quote a DBC string: backslashes and double quotes get a backslash"""
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+def _unescape(text):
+    """Undo `_escape`"""
+    return re.sub(r"\\(.)", r"\1", text, flags=re.DOTALL)
+
+def parse_dbc(text):
+    """Parse DBC text into a list of MessageDefinition"""
+    comments = {int(m.group(1)): _unescape(m.group(2)) for m in _COMMENT_RE.finditer(text)}
+    cycle_times = {int(m.group(1)): int(m.group(2)) for m in _CYCLE_TIME_RE.finditer(text)}
+
+    definitions = []
+    headers = list(_MESSAGE_RE.finditer(text))
+    for index, header in enumerate(headers):
+        raw_id = int(header.group(1))
+        # Signals belong to the message until the next BO_ line
+        end = headers[index + 1].start() if index + 1 < len(headers) else len(text)
+        signals = []
+        for m in _SIGNAL_RE.finditer(text, header.end(), end):
+            minimum, maximum = _number(m.group(8)), _number(m.group(9))
+            unspecified = minimum == 0 and maximum == 0
+            signals.append(Signal(
+                m.group(1),
+                int(m.group(2)),
+                int(m.group(3)),
+                LITTLE_ENDIAN if m.group(4) == "1" else BIG_ENDIAN,
+                factor=_number(m.group(6)),
+                offset=_number(m.group(7)),
+                signed=m.group(5) == "-",
+                minimum=None if unspecified else minimum,
+                maximum=None if unspecified else maximum,
+                unit=m.group(10)
+            ))
+        definitions.append(MessageDefinition(
+            header.group(2),
+            raw_id & ~EXTENDED_ID_FLAG,
+            int(header.group(3)),
+            signals,
+            is_extended_id=bool(raw_id & EXTENDED_ID_FLAG),
+            comment=comments.get(raw_id, ""),
+            cycle_time_ms=cycle_times.get(raw_id)
+        ))
+    return definitions
+
+def load_dbc(path):
+    """Parse a DBC file into a list of MessageDefinition"""
+    with open(path, encoding="latin-1") as f:
+        return parse_dbc(f.read())
+
+def dumps_dbc(definitions, periods_ms=None):
+    """Render message definitions (and optional cycle times) as DBC text"""
+    periods_ms = periods_ms or {}
+    lines = ['VERSION ""', "", "NS_ :", "", "BS_:", "", f"BU_: {NODE_NAME}", ""]
+    comments, cycle_times = [], []
+    for definition in definitions:
+        raw_id = definition.arbitration_id | (EXTENDED_ID_FLAG if definition.is_extended_id else 0)
+        lines.append(f"BO_ {raw_id} {definition.name}: {definition.length} {NODE_NAME}")
+        for s in definition.signals:
+            order = "1" if s.byte_order == LITTLE_ENDIAN else "0"
+            sign = "-" if s.signed else "+"
+            minimum = _format_number(s.minimum if s.minimum is not None else 0)
+            maximum = _format_number(s.maximum if s.maximum is not None else 0)
+            lines.append(
+                f" SG_ {s.name} : {s.start_bit}|{s.length}@{order}{sign} "
+                f"({_format_number(s.factor)},{_format_number(s.offset)}) "
+                f'[{minimum}|{maximum}] "{s.unit}" {NO_RECEIVER}'
+            )
+        lines.append("")
+
+        if definition.comment:
+            comments.append(f'CM_ BO_ {raw_id} "{_escape(definition.comment)}";')
+        period = periods_ms.get(definition.arbitration_id, definition.cycle_time_ms)
+        if period:
+            cycle_times.append(f'BA_ "GenMsgCycleTime" BO_ {raw_id} {period};')
+
+    lines.extend(comments)
+    if cycle_times:
+        lines.append('BA_DEF_ BO_ "GenMsgCycleTime" INT 0 65535;')
+        lines.append('BA_DEF_DEF_ "GenMsgCycleTime" 0;')
+        lines.extend(cycle_times)
+    return "\n".join(lines) + "\n"
+
+def dump_dbc(definitions, path, periods_ms=None):
+    """Write message definitions as a DBC file"""
+    with open(path, "w", encoding="latin-1") as f:
+        f.write(dumps_dbc(definitions, periods_ms))
+    logger.info(f"Exported {len(definitions)} messages to {path}")
+
+def _cache_path(path, cache_dir):
+    """Cache file for a DBC, keyed by its absolute path, size and mtime"""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{CACHE_FORMAT}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".pickle")
+
+def load_dbc_cached(path, cache_dir):
+    """Load a DBC, reusing parsed definitions cached on disk when unchanged.
+
+    The cache holds the parsed definitions; codecs are compiled from them
+    at startup, which is much cheaper than parsing the DBC text.
+    """
+    cache_file = _cache_path(path, cache_dir)
+    try:
+        with open(cache_file, "rb") as f:
+            definitions = pickle.load(f)
+        logger.info(f"Loaded {len(definitions)} messages for {path} from cache")
+        return definitions
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable DBC cache {cache_file}: {e}")
+
+    definitions = load_dbc(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "wb") as f:
+            pickle.dump(definitions, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not cache parsed DBC {path}: {e}")
+    logger.info(f"Parsed {len(definitions)} messages from {path}")
+    return definitions
@@ -0,0 +1,166 @@
+"""
+Fixed-width and log-linear histograms for timing measurements
+"""
+import math
+from array import array
+
+class Histogram:
+    """Counts of values in fixed-width bins over [low, high).
+
+    Recording is O(1) and memory is fixed however many samples are added;
+    values outside the range are counted in the first or last bin, and the
+    exact minimum and maximum are kept alongside. Percentiles are resolved to
+    the upper edge of their bin.
+    """
+
+    def __init__(self, low, high, bin_width):
+        if high <= low or bin_width <= 0:
+            raise ValueError("Histogram needs low < high and a positive bin width")
+        self.low = low
+        self.bin_width = bin_width
+        self.counts = array("Q", bytes(8 * int(-(-(high - low) // bin_width))))
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        index = int((value - self.low) // self.bin_width)
+        last = len(self.counts) - 1
+        self.counts[0 if index < 0 else last if index > last else index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p):
+        """Value below which `p` percent of the samples fall"""
+        if not self.count:
+            return None
+        rank = max(1, round(p / 100.0 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                edge = self.low + (index + 1) * self.bin_width
+                return max(self.min, min(self.max, edge))
+        return self.max
+
+    def summary(self, points=(50, 90, 99, 99.9)):
+        """Count, mean, extremes and percentiles"""
+        if not self.count:
+            return {"count": 0}
+        summary = {"count": self.count, "mean": self.mean, "min": self.min, "max": self.max}
+        summary.update({f"p{p:g}": self.percentile(p) for p in points})
+        return summary
+
+    def cumulative(self, bounds):
+        """Number of samples at or below each bound (Prometheus `le` buckets).
+
+        Bounds should fall on bin edges; a bin is counted once its upper
+        edge is within the bound.
+        """
+        counts = []
+        seen = 0
+        index = 0
+        for bound in bounds:
+            while index < len(self.counts) and self.low + (index + 1) * self.bin_width <= bound + self.bin_width * 1e-6:
+                seen += self.counts[index]
+                index += 1
+            counts.append(seen)
+        return counts
+
+    def bars(self, width=40):
+        """Text rendering of the occupied bins, one line per bin"""
+        peak = max(self.counts) if self.count else 0
+        lines = []
+        for index, count in enumerate(self.counts):
+            if count:
+                edge = self.low + index * self.bin_width
+                lines.append(f"{edge:>10g} | {'#' * max(1, round(count * width / peak))} {count}")
+        return lines
+
+
+class LogLinearHistogram:
+    """HDR-style histogram of non-negative integers (e.g. nanoseconds).
+
+    Values below 2**sub_bits get a bucket each; every higher power of two is
+    split into 2**(sub_bits - 1) equal buckets, so a bucket's width is at
+    most 1/2**(sub_bits - 1) of its values (about 6% with the default) over
+    the whole range. The bucket array is allocated up front and recording
+    is a few integer operations. Values above `max_value` go in the last
+    bucket; the exact maximum is kept alongside.
+    """
+
+    def __init__(self, max_value=1 << 34, sub_bits=5):
+        if sub_bits < 1 or max_value < 1:
+            raise ValueError("LogLinearHistogram needs a positive max value and sub_bits")
+        self.sub_bits = sub_bits
+        self._half_bits = sub_bits - 1
+        self.counts = array("Q", bytes(8 * (self.index(max_value) + 1)))
+        self._last = len(self.counts) - 1
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def index(self, value):
+        """Bucket of a value"""
+        shift = value.bit_length() - self.sub_bits
+        return value if shift <= 0 else (shift << self._half_bits) + (value >> shift)
+
+    def upper_edge(self, index):
+        """Largest value counted in a bucket"""
+        if index < 1 << self.sub_bits:
+            return index
+        shift = (index >> self._half_bits) - 1
+        return ((index - (shift << self._half_bits) + 1) << shift) - 1
+
+    def add(self, value):
+        shift = value.bit_length() - self.sub_bits
+        index = value if shift <= 0 else (shift << self._half_bits) + (value >> shift)
+        self.counts[index if index < self._last else self._last] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the samples of a histogram with the same layout"""
+        if len(other.counts) != len(self.counts) or other.sub_bits != self.sub_bits:
+            raise ValueError("Histograms have different bucket layouts")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p):
+        """Value below which `p` percent of the samples fall, to the upper edge of its bucket"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(p / 100.0 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.max, self.upper_edge(index))
+        return self.max
+
+    def summary(self, points=(50, 90, 99, 99.9)):
+        """Count, mean, maximum and percentiles"""
+        if not self.count:
+            return {"count": 0}
+        summary = {"count": self.count, "mean": self.mean, "max": self.max}
+        summary.update({f"p{p:g}": self.percentile(p) for p in points})
+        return summary
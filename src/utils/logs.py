@@ -0,0 +1,99 @@
+"""
+Background log output and summaries of repeated errors
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from ..config.settings import LOG_FORMAT, LOG_SUMMARY_INTERVAL
+
+def setup_logging(level=logging.INFO, stream=None, fmt=LOG_FORMAT):
+    """Log through a queue drained by a background thread.
+
+    Logging calls (on the event loop, the bus writer, ...) only put the
+    record on a queue; a QueueListener thread formats and writes it to
+    `stream` (stdout by default). At exit the listener flushes what is
+    queued and later records are written directly, as they are in forked
+    worker processes, where the listener thread does not exist.
+    """
+    output = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    output.setFormatter(logging.Formatter(fmt))
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+
+    def log_directly():
+        root.removeHandler(handler)
+        root.addHandler(output)
+
+    def stop():
+        listener.stop()
+        # Records from late finalizers (e.g. python-can's unclosed bus warning)
+        log_directly()
+
+    atexit.register(stop)
+    os.register_at_fork(after_in_child=log_directly)
+    return listener
+
+
+class RepeatedErrors:
+    """Collapse storms of identical errors into periodic summary lines.
+
+    The first record for a key (e.g. arbitration ID and errno) is logged in
+    full; repeats are only counted, and once `interval` seconds have passed
+    one line per key reports how many there were. Keys still repeating stay
+    suppressed through the next interval, while a key that went quiet is
+    logged in full again the next time it occurs. Not thread-safe: use one
+    per thread (TransmitQueue keeps its own).
+    """
+
+    def __init__(self, logger, interval=LOG_SUMMARY_INTERVAL, clock=time.monotonic):
+        self.logger = logger
+        self.interval = interval
+        self.clock = clock
+        self.suppressed = 0
+        self._keys = {}  # key -> [level, latest message, repeats this interval]
+        self._window_start = None
+
+    def log(self, level, key, message):
+        now = self.clock()
+        if self._window_start is not None and now - self._window_start >= self.interval:
+            self.flush(now)
+        entry = self._keys.get(key)
+        if entry is not None:
+            entry[1] = message
+            entry[2] += 1
+            self.suppressed += 1
+            return
+        self._keys[key] = [level, message, 0]
+        if self._window_start is None:
+            self._window_start = now
+        self.logger.log(level, message)
+
+    def poll(self):
+        """Log the summaries that are due; only reads the clock while errors are pending"""
+        if self._window_start is not None:
+            now = self.clock()
+            if now - self._window_start >= self.interval:
+                self.flush(now)
+
+    def flush(self, now=None):
+        """Log the repeats counted so far and start a new interval"""
+        now = self.clock() if now is None else now
+        elapsed = now - self._window_start if self._window_start is not None else 0.0
+        for key, entry in list(self._keys.items()):
+            level, message, repeats = entry
+            if repeats:
+                self.logger.log(level, f"{message} (repeated {repeats} times in {elapsed:.1f}s)")
+                entry[2] = 0
+            else:
+                del self._keys[key]
+        self._window_start = now if self._keys else None
@@ -0,0 +1,140 @@
+"""
+Deadline scheduler for cyclic CAN broadcasts
+"""
+import logging
+import math
+import time
+from functools import reduce
+from .clock import REAL_CLOCK
+from .histogram import Histogram
+from ..config.settings import TICK_HISTOGRAM_RANGE, TICK_HISTOGRAM_BIN
+
+logger = logging.getLogger(__name__)
+
+class DeadlineScheduler:
+    """Run per-ID send callbacks on absolute monotonic deadlines.
+
+    Deadlines sit on a fixed grid (start + n * tick) where the tick is the
+    greatest common divisor of the registered periods, so a late wakeup never
+    shifts the periods that follow it. Ticks that are overrun entirely are
+    skipped and counted as missed deadlines for every ID due in them. The
+    wall-clock duration of every tick is kept in a histogram.
+    Time comes from an injectable clock (see clock.py), so the same schedule
+    can run on a virtual clock faster than real time.
+    """
+
+    def __init__(self, periods_ms, clock=REAL_CLOCK):
+        self.periods_ms = dict(periods_ms)
+        self.clock = clock
+        self.callbacks = {}
+        self.tick_hooks = []
+        self.tick_ms = 0
+        self.tick_index = 0
+        self.start_time = None
+
+        # Statistics
+        self.ticks_run = 0
+        self.ticks_skipped = 0
+        self.max_lateness = 0.0
+        self.missed_deadlines = {}
+        self.tick_durations = Histogram(0.0, TICK_HISTOGRAM_RANGE, TICK_HISTOGRAM_BIN)  # seconds
+        self._divisors = {}
+
+    def register(self, arbitration_id, callback):
+        """Send `callback` every configured period for `arbitration_id`"""
+        if arbitration_id not in self.periods_ms:
+            raise KeyError(f"No broadcast period configured for {hex(arbitration_id)}")
+        self.callbacks[arbitration_id] = callback
+        self.missed_deadlines[arbitration_id] = 0
+        periods = [self.periods_ms[i] for i in self.callbacks]
+        self.tick_ms = reduce(math.gcd, periods)
+        self._divisors = {i: self.periods_ms[i] // self.tick_ms for i in self.callbacks}
+
+    def add_tick_hook(self, callback):
+        """Run `callback` at the start of every tick, before any sends"""
+        self.tick_hooks.append(callback)
+
+    def start(self, start_time=None):
+        """Anchor the deadline grid at `start_time` (defaults to now)"""
+        if not self.callbacks:
+            raise RuntimeError("No messages registered with the scheduler")
+        self.start_time = self.clock.now() if start_time is None else start_time
+        self.tick_index = 0
+
+    def deadline(self, tick_index):
+        """Absolute deadline of a tick on the clock's time base"""
+        return self.start_time + tick_index * self.tick_ms / 1000.0
+
+    def dispatch(self, now):
+        """Run the current tick and return the deadline of the next one"""
+        started = time.perf_counter()
+        # Skip (and count) every tick whose successor's deadline has also passed
+        current = int((now - self.start_time) * 1000.0 // self.tick_ms)
+        if current > self.tick_index:
+            self._record_missed(self.tick_index, current)
+            self.tick_index = current
+
+        lateness = now - self.deadline(self.tick_index)
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+
+        for hook in self.tick_hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Error in scheduler tick hook: {e}")
+
+        tick_index = self.tick_index
+        for arbitration_id, callback in self.callbacks.items():
+            if tick_index % self._divisors[arbitration_id] == 0:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Error sending {hex(arbitration_id)}: {e}")
+
+        self.ticks_run += 1
+        self.tick_index += 1
+        self.tick_durations.add(time.perf_counter() - started)
+        return self.deadline(self.tick_index)
+
+    def _record_missed(self, first, last):
+        """Count deadlines that fell in the skipped ticks [first, last)"""
+        skipped = last - first
+        self.ticks_skipped += skipped
+        for arbitration_id, divisor in self._divisors.items():
+            missed = (last - 1) // divisor - (first - 1) // divisor
+            self.missed_deadlines[arbitration_id] += missed
+        logger.warning(f"Scheduler overrun: skipped {skipped} tick(s) of {self.tick_ms}ms")
+
+    async def run(self, running=lambda: True, start_time=None):
+        """Dispatch ticks on their deadlines while `running()` is true.
+
+        `start_time` anchors the grid on a shared deadline, e.g. so several
+        processes tick in step; the first tick waits for it.
+        """
+        self.start(start_time)
+        await self.clock.sleep(max(0.0, self.start_time - self.clock.now()))
+        while running():
+            deadline = self.dispatch(self.clock.now())
+            await self.clock.sleep(max(0.0, deadline - self.clock.now()))
+
+    def run_until(self, end):
+        """Dispatch every tick before `end` back to back, without an event loop.
+
+        Only for an unpaced VirtualClock, which is advanced to each deadline;
+        used for offline trace generation.
+        """
+        self.start()
+        while self.clock.now() < end:
+            deadline = self.dispatch(self.clock.now())
+            self.clock.advance(deadline - self.clock.now())
+
+    def report(self):
+        """Summary of scheduling statistics"""
+        return {
+            "tick_ms": self.tick_ms,
+            "ticks_run": self.ticks_run,
+            "ticks_skipped": self.ticks_skipped,
+            "max_lateness_ms": round(self.max_lateness * 1000.0, 3),
+            "missed_deadlines": {hex(i): n for i, n in self.missed_deadlines.items()},
+        }
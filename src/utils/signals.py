@@ -0,0 +1,209 @@
+"""
+Table-driven CAN signal codec compiled from message/signal definitions
+"""
+import struct
+
+BIG_ENDIAN = "big_endian"
+LITTLE_ENDIAN = "little_endian"
+
+class Signal:
+    """One signal inside a CAN message.
+
+    `start_bit` follows DBC conventions: the LSB for little endian (Intel)
+    signals and the MSB in sawtooth numbering for big endian (Motorola)
+    signals. Physical value = raw * factor + offset.
+    """
+
+    def __init__(self, name, start_bit, length, byte_order=LITTLE_ENDIAN,
+                 factor=1, offset=0, signed=False, minimum=None, maximum=None, unit=""):
+        self.name = name
+        self.start_bit = start_bit
+        self.length = length
+        self.byte_order = byte_order
+        self.factor = factor
+        self.offset = offset
+        self.signed = signed
+        self.minimum = minimum
+        self.maximum = maximum
+        self.unit = unit
+
+    @property
+    def is_scaled(self):
+        return self.factor != 1 or self.offset != 0
+
+    @property
+    def raw_range(self):
+        """Smallest and largest raw value the signal can carry"""
+        if self.signed:
+            return -(1 << (self.length - 1)), (1 << (self.length - 1)) - 1
+        return 0, (1 << self.length) - 1
+
+    @property
+    def byte_offset(self):
+        """First payload byte of a byte-aligned signal, else None"""
+        if self.length % 8:
+            return None
+        if self.byte_order == LITTLE_ENDIAN and self.start_bit % 8 == 0:
+            return self.start_bit // 8
+        if self.byte_order == BIG_ENDIAN and self.start_bit % 8 == 7:
+            return self.start_bit // 8
+        return None
+
+    def __repr__(self):
+        return f"Signal({self.name!r}, {self.start_bit}, {self.length}, {self.byte_order})"
+
+
+class MessageDefinition:
+    """A CAN message and the signals packed into it"""
+
+    def __init__(self, name, arbitration_id, length, signals, is_extended_id=False,
+                 comment="", cycle_time_ms=None):
+        self.name = name
+        self.arbitration_id = arbitration_id
+        self.length = length
+        self.signals = list(signals)
+        self.is_extended_id = is_extended_id
+        self.comment = comment
+        self.cycle_time_ms = cycle_time_ms
+
+    def __repr__(self):
+        return f"MessageDefinition({self.name!r}, {hex(self.arbitration_id)}, {len(self.signals)} signals)"
+
+
+# struct codes for byte-aligned signals, keyed by (length, signed)
+_STRUCT_CODES = {
+    (8, False): "B", (8, True): "b",
+    (16, False): "H", (16, True): "h",
+    (32, False): "I", (32, True): "i",
+    (64, False): "Q", (64, True): "q",
+}
+
+class MessageCodec:
+    """Encoder/decoder for one message, compiled once from its definition.
+
+    Byte-aligned layouts compile to a single precomputed `struct.Struct`;
+    anything else falls back to shifting signals into a payload integer.
+    Either way the encoder is generated as one function, so encoding a whole
+    message is one call taking physical values in `signal_names` order.
+    Raw values are saturated to the signal's range; unscaled signals keep
+    the `int()` truncation the hand-written senders used, scaled ones round.
+    """
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.arbitration_id = definition.arbitration_id
+        self.length = definition.length
+        self.signals = list(definition.signals)
+        self.signal_names = tuple(s.name for s in self.signals)
+        self.struct = self._compile_struct()
+        self.encode_into = self._compile_encoder()
+
+    def encode(self, *values):
+        """Encode physical values into a new payload"""
+        buffer = bytearray(self.length)
+        self.encode_into(buffer, *values)
+        return bytes(buffer)
+
+    def decode(self, data):
+        """Decode a payload into a tuple of physical values"""
+        if self.struct is not None:
+            raws = self.struct.unpack_from(data, 0)
+        else:
+            raws = self._unpack_bits(data)
+        return tuple(
+            raw * s.factor + s.offset if s.is_scaled else raw
+            for s, raw in zip(self.signals, raws)
+        )
+
+    def decode_dict(self, data):
+        """Decode a payload into a {signal name: physical value} mapping"""
+        return dict(zip(self.signal_names, self.decode(data)))
+
+    def _compile_struct(self):
+        """Single struct.Struct for byte-aligned layouts, else None"""
+        orders = {s.byte_order for s in self.signals if s.length > 8}
+        if len(orders) > 1:
+            return None
+        prefix = ">" if orders == {BIG_ENDIAN} else "<"
+
+        placed = []
+        for signal in self.signals:
+            offset = signal.byte_offset
+            code = _STRUCT_CODES.get((signal.length, signal.signed))
+            if offset is None or code is None:
+                return None
+            placed.append((offset, signal.length // 8, code))
+
+        # Signals must appear in payload order without overlapping
+        fmt, position = prefix, 0
+        for offset, size, code in placed:
+            if offset < position:
+                return None
+            fmt += "x" * (offset - position) + code
+            position = offset + size
+        if position > self.length:
+            return None
+        fmt += "x" * (self.length - position)
+        return struct.Struct(fmt)
+
+    def _compile_encoder(self):
+        """Generate `encode_into(buffer, *values)` specialised to this layout"""
+        args = [f"v{i}" for i in range(len(self.signals))]
+        lines = [f"def encode_into(buffer, {', '.join(args)}):"]
+        for i, signal in enumerate(self.signals):
+            lo, hi = signal.raw_range
+            if signal.is_scaled:
+                lines.append(f"    r{i} = round((v{i} - {signal.offset!r}) * {1 / signal.factor!r})")
+            else:
+                lines.append(f"    r{i} = int(v{i})")
+            lines.append(f"    r{i} = {lo} if r{i} < {lo} else {hi} if r{i} > {hi} else r{i}")
+
+        raws = ", ".join(f"r{i}" for i in range(len(self.signals)))
+        if self.struct is not None:
+            lines.append(f"    _pack_into(buffer, 0, {raws})")
+            namespace = {"_pack_into": self.struct.pack_into}
+        else:
+            lines.append(f"    _pack_bits(buffer, ({raws},))")
+            namespace = {"_pack_bits": self._pack_bits}
+
+        exec(compile("\n".join(lines), f"<codec {hex(self.arbitration_id)}>", "exec"), namespace)
+        return namespace["encode_into"]
+
+    def _bit_positions(self, signal):
+        """LSB position of a signal in the little/big endian payload integer"""
+        if signal.byte_order == LITTLE_ENDIAN:
+            return signal.start_bit
+        msb = (self.length - 1 - signal.start_bit // 8) * 8 + signal.start_bit % 8
+        return msb - signal.length + 1
+
+    def _pack_bits(self, buffer, raws):
+        """Fallback encoder for layouts that are not byte aligned"""
+        little = big = 0
+        for signal, raw in zip(self.signals, raws):
+            mask = (1 << signal.length) - 1
+            shift = self._bit_positions(signal)
+            if signal.byte_order == LITTLE_ENDIAN:
+                little |= (raw & mask) << shift
+            else:
+                big |= (raw & mask) << shift
+        little |= int.from_bytes(big.to_bytes(self.length, "big"), "little")
+        buffer[:self.length] = little.to_bytes(self.length, "little")
+
+    def _unpack_bits(self, data):
+        """Fallback decoder for layouts that are not byte aligned"""
+        payload = bytes(data[:self.length]).ljust(self.length, b"\0")
+        little = int.from_bytes(payload, "little")
+        big = int.from_bytes(payload, "big")
+        raws = []
+        for signal in self.signals:
+            source = little if signal.byte_order == LITTLE_ENDIAN else big
+            raw = (source >> self._bit_positions(signal)) & ((1 << signal.length) - 1)
+            if signal.signed and raw >> (signal.length - 1):
+                raw -= 1 << signal.length
+            raws.append(raw)
+        return raws
+
+
+def compile_codecs(definitions):
+    """Compile every message definition into an {arbitration ID: codec} table"""
+    return {d.arbitration_id: MessageCodec(d) for d in definitions}
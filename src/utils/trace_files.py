@@ -0,0 +1,55 @@
+"""
+Buffered CAN trace file writers (candump .log, Vector .asc, .blf, binary .vtrace)
+"""
+import os
+import can
+from .binary_trace import BINARY_TRACE_SUFFIX, BinaryTrace, BinaryTraceWriter
+
+# File suffix -> (python-can writer, file mode)
+TRACE_WRITERS = {
+    ".log": (can.CanutilsLogWriter, "w"),
+    ".asc": (can.ASCWriter, "w"),
+    ".blf": (can.BLFWriter, "wb"),
+}
+
+def open_trace_writer(path, buffer_size=1 << 20, fd=False):
+    """Writer for a trace file chosen by suffix, on a file with a large write buffer.
+
+    python-can opens its files with the default 8 KiB buffer; a larger one
+    turns millions of small per-frame writes into few large ones. Other
+    suffixes python-can supports (.csv, .mf4, ...) go through `can.Logger`.
+    Binary traces use 64-byte payload records when `fd` is set.
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == BINARY_TRACE_SUFFIX:
+        return BinaryTraceWriter(path, fd=fd)
+    if suffix not in TRACE_WRITERS:
+        return can.Logger(path)
+    writer_class, mode = TRACE_WRITERS[suffix]
+    if "b" in mode:
+        f = open(path, mode, buffering=buffer_size)
+    else:
+        f = open(path, mode, buffering=buffer_size, encoding="utf-8")
+    return writer_class(f)
+
+def read_trace(path, start=None, end=None):
+    """Iterate the frames of a trace file between `start` and `end` seconds
+    from its first frame.
+
+    Binary traces seek straight to the window through their index; other
+    formats are streamed from the beginning.
+    """
+    if os.path.splitext(path)[1].lower() == BINARY_TRACE_SUFFIX:
+        trace = BinaryTrace(path)
+        yield from trace.messages(trace.time_slice(start, end))
+        return
+    first = None
+    for msg in can.LogReader(path):
+        if first is None:
+            first = msg.timestamp
+        offset = msg.timestamp - first
+        if start is not None and offset < start:
+            continue
+        if end is not None and offset > end:
+            break
+        yield msg
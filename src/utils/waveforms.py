@@ -0,0 +1,87 @@
+"""
+Precomputed waveforms and block-drawn noise for the oscillation model
+"""
+import math
+from functools import lru_cache
+import numpy as np
+
+class SineTable:
+    """One period of a sine wave sampled at a fixed time step"""
+
+    def __init__(self, period, resolution):
+        self.period = period
+        self.resolution = resolution
+        self.steps = max(1, int(round(period / resolution)))
+        self.samples = [math.sin(2 * math.pi * i / self.steps) for i in range(self.steps)]
+
+    def step(self, t):
+        """Index of the sample nearest to time t"""
+        return int(t / self.resolution + 0.5) % self.steps
+
+
+@lru_cache(maxsize=None)
+def sine_table(period, resolution):
+    """Shared SineTable for a period"""
+    return SineTable(period, resolution)
+
+
+class Oscillator:
+    """A signal oscillating between `low` and `high` with scaled noise.
+
+    `bases` holds mid + amplitude * sin over one period, phase shifted, at
+    the table resolution, so producing a value is a lookup, one multiply-add
+    for the noise and the clamp. The clamp is max(low, min(high, x)) so
+    inverted bands (low > high) pin to `low` as the hand-written model did.
+    """
+
+    def __init__(self, low, high, period, phase=0, noise=0.1, resolution=0.1):
+        self.low = low
+        self.high = high
+        table = sine_table(period, resolution)
+        shift = table.step(phase)
+        mid = (high + low) / 2
+        amplitude = (high - low) / 2
+        samples = table.samples[shift:] + table.samples[:shift]
+        self.bases = [mid + amplitude * sample for sample in samples]
+        self.steps = table.steps
+        self.noise_amplitude = noise * amplitude
+
+    def value(self, step, noise):
+        """Value at table step `step` with a noise sample in [-1, 1)"""
+        base = self.bases[step % self.steps]
+        return max(self.low, min(self.high, base + self.noise_amplitude * noise))
+
+
+@lru_cache(maxsize=None)
+def oscillator(low, high, period, phase=0, noise=0.1, resolution=0.1):
+    """Shared Oscillator; tables are read-only so every sender can use the same one"""
+    return Oscillator(low, high, period, phase, noise, resolution)
+
+
+class NoiseBlock:
+    """Uniform noise in [-1, 1) drawn in large blocks.
+
+    Blocks come from a NumPy generator seeded with `seed` (one vectorised
+    draw instead of a Python call per sample) and are consumed in order by
+    `take(n)`, so the noise sequence depends only on the seed.
+    """
+
+    def __init__(self, seed=None, size=4096):
+        self.generator = np.random.default_rng(seed)
+        self.size = size
+        self.samples = []
+        self.position = 0
+
+    def refill(self, count=0):
+        """Discard what is left and draw a fresh block (at least `count` samples)"""
+        block = self.generator.random(max(self.size, count))
+        self.samples = (block * 2.0 - 1.0).tolist()
+        self.position = 0
+
+    def take(self, count):
+        """The next `count` samples as a list"""
+        if self.position + count > len(self.samples):
+            self.refill(count)
+        start = self.position
+        self.position += count
+        return self.samples[start:self.position]